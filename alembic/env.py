@@ -11,6 +11,10 @@ from app.models.chat import Chat
 from app.models.session import ConversationSession
 from sqlalchemy import create_engine
 from app.models.refresh_token import RefreshToken
+from app.models.embedding_cache import CachedEmbedding
+from app.models.conversation_summary import ConversationSummary
+from app.models.answer_cache import CachedAnswer
+from app.models.ingestion_job import IngestionJob
 
 from alembic import context
 from app.db.base import Base
@@ -0,0 +1,41 @@
+"""add uploaded_files.ingested_at
+
+Revision ID: 1d7e4b9a3c52
+Revises: c8d3a1f5e294
+Create Date: 2026-03-19 14:06:51.382907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d7e4b9a3c52'
+down_revision: Union[str, Sequence[str], None] = 'c8d3a1f5e294'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('uploaded_files', sa.Column('ingested_at', sa.DateTime(timezone=True), nullable=True))
+
+    # files with embeddings and no unfinished ingestion job count as ingested
+    op.execute("""
+        UPDATE uploaded_files f
+        SET ingested_at = f.uploaded_at
+        WHERE EXISTS (SELECT 1 FROM file_embeddings e WHERE e.file_id = f.id)
+          AND NOT EXISTS (
+              SELECT 1 FROM ingestion_jobs j
+              WHERE j.kind = 'file'
+                AND j.status <> 'done'
+                AND (j.payload ->> 'file_id')::int = f.id
+          )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('uploaded_files', 'ingested_at')
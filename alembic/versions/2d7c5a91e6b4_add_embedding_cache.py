@@ -0,0 +1,40 @@
+"""add embedding_cache table
+
+Revision ID: 2d7c5a91e6b4
+Revises: 9e6a2c4b8f30
+Create Date: 2026-02-24 10:43:18.902215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7c5a91e6b4'
+down_revision: Union[str, Sequence[str], None] = '9e6a2c4b8f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('embedding_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('dimensions', sa.Integer(), nullable=False),
+    sa.Column('embedding', Vector(), nullable=False),
+    sa.Column('tokens', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_embedding_cache_last_used_at'), 'embedding_cache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_embedding_cache_last_used_at'), table_name='embedding_cache')
+    op.drop_table('embedding_cache')
@@ -0,0 +1,62 @@
+"""add ANN index on file_embeddings.embedding
+
+Revision ID: 3a9d6c1e7b42
+Revises: c05f7daecd63
+Create Date: 2026-02-09 10:12:41.204117
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d6c1e7b42'
+down_revision: Union[str, Sequence[str], None] = 'c05f7daecd63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_file_embeddings_embedding_ann"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same env vars as app/core/config.py (VECTOR_INDEX_TYPE, HNSW_*, IVFFLAT_*)
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+
+    if index_type == "hnsw":
+        index_with = {
+            "m": int(os.getenv("HNSW_M", "16")),
+            "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "64")),
+        }
+    elif index_type == "ivfflat":
+        index_with = {"lists": int(os.getenv("IVFFLAT_LISTS", "100"))}
+    else:
+        raise ValueError(f"Unsupported VECTOR_INDEX_TYPE: {index_type}")
+
+    # build without locking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            "file_embeddings",
+            ["embedding"],
+            unique=False,
+            postgresql_using=index_type,
+            postgresql_with=index_with,
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name="file_embeddings",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
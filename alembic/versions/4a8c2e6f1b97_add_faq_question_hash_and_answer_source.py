@@ -0,0 +1,54 @@
+"""add file_embeddings.question_hash and chats.answer_source
+
+Revision ID: 4a8c2e6f1b97
+Revises: b6e1d4f09a52
+Create Date: 2026-03-04 09:51:37.662019
+
+"""
+import re
+import hashlib
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a8c2e6f1b97'
+down_revision: Union[str, Sequence[str], None] = 'b6e1d4f09a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _question_hash(text_content: str) -> str:
+    # same as knowledge_base_service.qa_question_hash (normalize_question)
+    question = (text_content or "").partition("\nAnswer: ")[0].removeprefix("Question: ")
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", question)).strip()
+    normalized = normalized.lower().rstrip("?!. ")
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('answer_source', sa.String(length=20), nullable=True))
+    op.add_column('file_embeddings', sa.Column('question_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_file_embeddings_question_hash'), 'file_embeddings', ['question_hash'], unique=False)
+
+    # backfill existing curated Q&A rows
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text("SELECT id, text_content FROM file_embeddings WHERE source_type = 'kb_qa'")
+    ).fetchall()
+    for row in rows:
+        conn.execute(
+            sa.text("UPDATE file_embeddings SET question_hash = :hash WHERE id = :id"),
+            {"hash": _question_hash(row.text_content), "id": row.id},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_file_embeddings_question_hash'), table_name='file_embeddings')
+    op.drop_column('file_embeddings', 'question_hash')
+    op.drop_column('chats', 'answer_source')
@@ -0,0 +1,80 @@
+"""add quantized (halfvec / binary) embedding indexes
+
+Revision ID: 5b0f3e8d6a17
+Revises: e41b7d09c2f5
+Create Date: 2026-02-17 11:05:32.774190
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0f3e8d6a17'
+down_revision: Union[str, Sequence[str], None] = 'e41b7d09c2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Expression indexes: the compact copy lives in the index only, the heap
+# keeps the full vector for the exact re-rank. Building the index is the
+# migration path for existing rows; new rows are indexed on insert.
+# Expressions must stay identical to _SHORTLIST_DISTANCES in
+# app/services/vector_search.py.
+QUANTIZED_INDEXES = {
+    "halfvec": (
+        "ix_file_embeddings_embedding_halfvec",
+        "(CAST(embedding AS halfvec(1536))) halfvec_ip_ops",
+    ),
+    "binary": (
+        "ix_file_embeddings_embedding_binary",
+        "(CAST(binary_quantize(embedding) AS bit(1536))) bit_hamming_ops",
+    ),
+}
+
+
+def _index_options():
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+
+    if index_type == "hnsw":
+        return index_type, (
+            f"m = {int(os.getenv('HNSW_M', '16'))}, "
+            f"ef_construction = {int(os.getenv('HNSW_EF_CONSTRUCTION', '64'))}"
+        )
+    if index_type == "ivfflat":
+        return index_type, f"lists = {int(os.getenv('IVFFLAT_LISTS', '100'))}"
+
+    raise ValueError(f"Unsupported VECTOR_INDEX_TYPE: {index_type}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same env var as app/core/config.py; nothing is built for "none".
+    # Once a quantized index is in use, ix_file_embeddings_embedding_ann can
+    # be dropped to reclaim its memory. Searches only shortlist when the
+    # index exists (vector_search._SHORTLIST_INDEXES), so enabling the
+    # setting later needs this index built by hand or by re-running this.
+    mode = os.getenv("VECTOR_SHORTLIST", "none").lower()
+    if mode == "none":
+        return
+    if mode not in QUANTIZED_INDEXES:
+        raise ValueError(f"Unsupported VECTOR_SHORTLIST: {mode}")
+
+    index_type, index_with = _index_options()
+    name, expression = QUANTIZED_INDEXES[mode]
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON file_embeddings USING {index_type} ({expression}) "
+            f"WITH ({index_with})"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in QUANTIZED_INDEXES.values():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,30 @@
+"""add uploaded_files.content_hash
+
+Revision ID: 6e2b8f04c7d1
+Revises: a2f6c9d41e73
+Create Date: 2026-03-11 09:48:27.603415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b8f04c7d1'
+down_revision: Union[str, Sequence[str], None] = 'a2f6c9d41e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('uploaded_files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_uploaded_files_content_hash'), 'uploaded_files', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_uploaded_files_content_hash'), table_name='uploaded_files')
+    op.drop_column('uploaded_files', 'content_hash')
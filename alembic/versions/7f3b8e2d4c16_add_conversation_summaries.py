@@ -0,0 +1,40 @@
+"""add conversation_summaries table
+
+Revision ID: 7f3b8e2d4c16
+Revises: 2d7c5a91e6b4
+Create Date: 2026-02-26 15:07:52.318840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3b8e2d4c16'
+down_revision: Union[str, Sequence[str], None] = '2d7c5a91e6b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('conversation_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sess_id', sa.BigInteger(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('last_chat_id', sa.Integer(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+    sa.Column('completion_tokens', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_conversation_summaries_sess_id'), 'conversation_summaries', ['sess_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_conversation_summaries_sess_id'), table_name='conversation_summaries')
+    op.drop_table('conversation_summaries')
@@ -0,0 +1,45 @@
+"""add text_search tsvector column for hybrid retrieval
+
+Revision ID: 8c4e2f7a1d93
+Revises: 3a9d6c1e7b42
+Create Date: 2026-02-11 15:48:03.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2f7a1d93'
+down_revision: Union[str, Sequence[str], None] = '3a9d6c1e7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'file_embeddings',
+        sa.Column(
+            'text_search',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', coalesce(text_content, ''))", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        'ix_file_embeddings_text_search',
+        'file_embeddings',
+        ['text_search'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_file_embeddings_text_search', table_name='file_embeddings')
+    op.drop_column('file_embeddings', 'text_search')
@@ -0,0 +1,87 @@
+"""add embedding_short (Matryoshka) column
+
+Revision ID: 9e6a2c4b8f30
+Revises: 5b0f3e8d6a17
+Create Date: 2026-02-19 16:21:09.640553
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e6a2c4b8f30'
+down_revision: Union[str, Sequence[str], None] = '5b0f3e8d6a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_file_embeddings_embedding_short_ann"
+
+# rows backfilled per transaction
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same env vars as app/core/config.py
+    dimensions = int(os.getenv("EMBEDDING_SHORT_DIMENSIONS", "256"))
+
+    op.add_column('file_embeddings', sa.Column('embedding_short', Vector(dim=dimensions), nullable=True))
+
+    # backfill existing rows: leading dimensions, re-normalised (pgvector >= 0.7)
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        while True:
+            result = conn.execute(
+                sa.text(f"""
+                    UPDATE file_embeddings
+                    SET embedding_short = l2_normalize(subvector(embedding, 1, {dimensions}))
+                    WHERE id IN (
+                        SELECT id FROM file_embeddings
+                        WHERE embedding_short IS NULL
+                        LIMIT {BATCH_SIZE}
+                    )
+                """)
+            )
+            if result.rowcount == 0:
+                break
+
+        # the ANN index is only needed when search shortlists on it; without
+        # it searches skip the matryoshka shortlist (vector_search._SHORTLIST_INDEXES)
+        if os.getenv("VECTOR_SHORTLIST", "none").lower() == "matryoshka":
+            index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+            if index_type == "hnsw":
+                index_with = {
+                    "m": int(os.getenv("HNSW_M", "16")),
+                    "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "64")),
+                }
+            else:
+                index_with = {"lists": int(os.getenv("IVFFLAT_LISTS", "100"))}
+
+            op.create_index(
+                INDEX_NAME,
+                "file_embeddings",
+                ["embedding_short"],
+                unique=False,
+                postgresql_using=index_type,
+                postgresql_with=index_with,
+                postgresql_ops={"embedding_short": "vector_cosine_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name="file_embeddings",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('file_embeddings', 'embedding_short')
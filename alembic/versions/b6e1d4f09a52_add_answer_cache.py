@@ -0,0 +1,58 @@
+"""add answer_cache table and kb_version_seq
+
+Revision ID: b6e1d4f09a52
+Revises: 7f3b8e2d4c16
+Create Date: 2026-03-02 11:26:04.517393
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d4f09a52'
+down_revision: Union[str, Sequence[str], None] = '7f3b8e2d4c16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bumped on every knowledge base change; cached answers carry the value they saw
+    op.execute("CREATE SEQUENCE IF NOT EXISTS kb_version_seq")
+    op.execute("SELECT nextval('kb_version_seq')")
+
+    op.create_table('answer_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question', sa.Text(), nullable=False),
+    sa.Column('question_embedding', Vector(dim=1536), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('kb_version', sa.BigInteger(), nullable=False),
+    sa.Column('scope', sa.String(length=64), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_answer_cache_kb_version'), 'answer_cache', ['kb_version'], unique=False)
+    op.create_index(op.f('ix_answer_cache_last_used_at'), 'answer_cache', ['last_used_at'], unique=False)
+    op.create_index(
+        'ix_answer_cache_question_embedding',
+        'answer_cache',
+        ['question_embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_ops={'question_embedding': 'vector_cosine_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_answer_cache_question_embedding', table_name='answer_cache')
+    op.drop_index(op.f('ix_answer_cache_last_used_at'), table_name='answer_cache')
+    op.drop_index(op.f('ix_answer_cache_kb_version'), table_name='answer_cache')
+    op.drop_table('answer_cache')
+    op.execute("DROP SEQUENCE IF EXISTS kb_version_seq")
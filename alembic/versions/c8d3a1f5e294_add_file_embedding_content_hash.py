@@ -0,0 +1,35 @@
+"""add file_embeddings.content_hash for incremental re-ingestion
+
+Revision ID: c8d3a1f5e294
+Revises: 6e2b8f04c7d1
+Create Date: 2026-03-13 16:05:44.219086
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d3a1f5e294'
+down_revision: Union[str, Sequence[str], None] = '6e2b8f04c7d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_embeddings', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # backfill: same as chunk_sync.chunk_content_hash (sha256 of the UTF-8 text)
+    op.execute(
+        "UPDATE file_embeddings "
+        "SET content_hash = encode(sha256(convert_to(text_content, 'UTF8')), 'hex') "
+        "WHERE text_content IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_embeddings', 'content_hash')
@@ -0,0 +1,82 @@
+"""conversation_sessions: failure_count counter, one row per sess_id
+
+Revision ID: d93f5a7c2e08
+Revises: 4a8c2e6f1b97
+Create Date: 2026-03-06 14:32:10.884127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93f5a7c2e08'
+down_revision: Union[str, Sequence[str], None] = '4a8c2e6f1b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # older databases got this table from the models, not from a migration
+    if not sa.inspect(op.get_bind()).has_table('conversation_sessions'):
+        op.create_table('conversation_sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sess_id', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('assigned_agent_id', sa.Integer(), nullable=True),
+        sa.Column('assigned_at', sa.DateTime(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('failure_count', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_conversation_sessions_id'), 'conversation_sessions', ['id'], unique=False)
+    else:
+        op.add_column(
+            'conversation_sessions',
+            sa.Column('failure_count', sa.Integer(), server_default='0', nullable=False),
+        )
+
+        # keep one row per sess_id (prefer the one an agent is assigned to, then the newest)
+        op.execute("""
+            DELETE FROM conversation_sessions
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY sess_id
+                        ORDER BY (assigned_agent_id IS NOT NULL) DESC, id DESC
+                    ) AS rn
+                    FROM conversation_sessions
+                ) ranked
+                WHERE rn > 1
+            )
+        """)
+
+        op.drop_index(
+            op.f('ix_conversation_sessions_sess_id'),
+            table_name='conversation_sessions',
+            if_exists=True,
+        )
+
+    op.create_index(op.f('ix_conversation_sessions_sess_id'), 'conversation_sessions', ['sess_id'], unique=True)
+
+    # carry over the failures counted from chats so far
+    op.execute("""
+        INSERT INTO conversation_sessions (sess_id, status, failure_count, created_at)
+        SELECT sess_id, 'bot_active', COUNT(*), now()
+        FROM chats
+        WHERE sender = 'bot' AND needs_human = true AND sess_id IS NOT NULL
+        GROUP BY sess_id
+        ON CONFLICT (sess_id) DO UPDATE SET failure_count = EXCLUDED.failure_count
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_conversation_sessions_sess_id'), table_name='conversation_sessions')
+    op.create_index(op.f('ix_conversation_sessions_sess_id'), 'conversation_sessions', ['sess_id'], unique=False)
+    op.drop_column('conversation_sessions', 'failure_count')
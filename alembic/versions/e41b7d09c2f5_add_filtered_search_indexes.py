@@ -0,0 +1,94 @@
+"""add indexes for filtered vector search
+
+Revision ID: e41b7d09c2f5
+Revises: 8c4e2f7a1d93
+Create Date: 2026-02-13 09:27:55.318402
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7d09c2f5'
+down_revision: Union[str, Sequence[str], None] = '8c4e2f7a1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# one partial ANN index per source so "source_type = X" searches never
+# post-filter the global index
+SOURCE_TYPES = ("file", "kb_url", "kb_qa")
+
+BTREE_INDEXES = {
+    "ix_file_embeddings_user_id_source_type": ["user_id", "source_type"],
+    "ix_file_embeddings_file_id": ["file_id"],
+    "ix_file_embeddings_url_id": ["url_id"],
+    "ix_file_embeddings_qa_id": ["qa_id"],
+}
+
+
+def _ann_options():
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+
+    if index_type == "hnsw":
+        return index_type, {
+            "m": int(os.getenv("HNSW_M", "16")),
+            "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "64")),
+        }
+    if index_type == "ivfflat":
+        return index_type, {"lists": int(os.getenv("IVFFLAT_LISTS", "100"))}
+
+    raise ValueError(f"Unsupported VECTOR_INDEX_TYPE: {index_type}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    index_type, index_with = _ann_options()
+
+    with op.get_context().autocommit_block():
+        for name, columns in BTREE_INDEXES.items():
+            op.create_index(
+                name,
+                "file_embeddings",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+        for source_type in SOURCE_TYPES:
+            op.create_index(
+                f"ix_file_embeddings_embedding_ann_{source_type}",
+                "file_embeddings",
+                ["embedding"],
+                unique=False,
+                postgresql_using=index_type,
+                postgresql_with=index_with,
+                postgresql_ops={"embedding": "vector_cosine_ops"},
+                postgresql_where=sa.text(f"source_type = '{source_type}'"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for source_type in SOURCE_TYPES:
+            op.drop_index(
+                f"ix_file_embeddings_embedding_ann_{source_type}",
+                table_name="file_embeddings",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+        for name in BTREE_INDEXES:
+            op.drop_index(
+                name,
+                table_name="file_embeddings",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -5,6 +5,7 @@ from app.api.v1 import websocket as websocket_router
 from app.api.v1 import support as support_router
 from app.api.v1 import chat
 from app.api.v1 import support_alert
+from app.api.v1 import ingestion_jobs
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/v1/auth", tags=["auth"])
@@ -16,6 +17,7 @@ api_router.include_router(qa.router, prefix="/v1", tags=["qa"])
 api_router.include_router(chat.router, prefix="/v1", tags=["chat"])
 api_router.include_router(support_alert.router, prefix="/v1", tags=["support_alert"])
 api_router.include_router(dashboard.router, prefix="/v1", tags=["dashboard"])
+api_router.include_router(ingestion_jobs.router, prefix="/v1", tags=["ingestion_jobs"])
 # WebSocket endpoints (no prefix)
 api_router.include_router(websocket_router.router)
 
@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_db
+from app.services.ingestion_queue import ingestion_queue, job_to_dict
+
+router = APIRouter()
+
+
+# =========================================================
+# LIST JOBS (PAGINATION + STATUS FILTER)
+# =========================================================
+@router.get("/ingestion-jobs")
+def list_ingestion_jobs(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    status: Optional[str] = Query(None, description="queued | running | done | failed"),
+    db: Session = Depends(get_db),
+):
+    try:
+        return ingestion_queue.list_jobs(db, status=status, page=page, page_size=page_size)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# =========================================================
+# JOB STATUS / PROGRESS
+# =========================================================
+@router.get("/ingestion-jobs/{job_id}")
+def get_ingestion_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    job = ingestion_queue.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+
+    return job_to_dict(job)
@@ -25,6 +25,7 @@ def add_qa_to_knowledge_base(
         result = service.add_qa(
             question=payload.question,
             answer=payload.answer,
+            tenant_id=payload.tenant_id,
         )
         return result
 
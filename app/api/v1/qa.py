@@ -1,16 +1,28 @@
+import json
+from contextlib import aclosing
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.dependencies import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import get_async_db
+from app.core.openai_client import openai_clients
+from app.db.session import AsyncSessionLocal
+from app.schemas.qa import QARequest
 from app.services.qa_service import QAService
+from app.services.embedding_cache import query_embedding_cache
 
 router = APIRouter()
 
 
 @router.post("/qa")
-async def ask_question(payload: dict, db: Session = Depends(get_db)):
+async def ask_question(payload: QARequest, db: AsyncSession = Depends(get_async_db)):
     try:
         service = QAService(db)
-        answer = await service.ask(payload["question"], payload["user_id"])
+        answer = await service.ask(
+            payload.question,
+            payload.user_id,
+            filters=payload.search_filters(),
+        )
         return {"answer": answer}
 
     except ValueError as e:
@@ -18,3 +30,49 @@ async def ask_question(payload: dict, db: Session = Depends(get_db)):
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/qa/stream")
+async def ask_question_stream(payload: QARequest):
+    """
+    Server-Sent Events variant of POST /qa: "answer_delta" events while the
+    answer is generated, then one "answer_done" event.
+    """
+    if not payload.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    async def events():
+        # own session: it has to outlive the request handler
+        # a disconnect cancels / closes this generator; aclosing hands that
+        # to ask_stream, which still saves the question and partial answer
+        async with AsyncSessionLocal() as db:
+            try:
+                async with aclosing(
+                    QAService(db).ask_stream(
+                        payload.question,
+                        payload.user_id,
+                        filters=payload.search_filters(),
+                    )
+                ) as stream:
+                    async for event in stream:
+                        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+            except Exception as e:
+                event = {"type": "error", "detail": str(e)}
+                yield f"event: error\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/qa/cache-stats")
+def qa_cache_stats():
+    return {"query_embedding_cache": query_embedding_cache.stats()}
+
+
+@router.get("/qa/openai-pool-stats")
+def qa_openai_pool_stats():
+    return openai_clients.stats()
@@ -14,6 +14,7 @@ def get_unassigned_sessions(db: Session = Depends(get_db)):
     sessions = (
         db.query(ConversationSession)
         .filter(
+            ConversationSession.status == "pending_agent",
             ConversationSession.assigned_agent_id.is_(None)
         )
         .order_by(ConversationSession.created_at.desc())
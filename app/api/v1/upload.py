@@ -1,30 +1,114 @@
 # app/api/routes/upload.py
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from app.core.dependencies import get_db
-from app.services.build_service import BuildService
+from app.models.uploaded_file import UploadedFile
+from app.services.build_service import (
+    BuildService,
+    UploadTooLargeError,
+    UnsupportedUploadTypeError,
+)
+from app.services.ingestion_queue import ingestion_queue, ingestion_worker
 
 router = APIRouter()
 
 
-@router.post("/upload-file")
+@router.post("/upload-file", status_code=status.HTTP_202_ACCEPTED)
 def upload_file(
+    response: Response,
     file: UploadFile = File(...),
+    update: bool = Form(False),
+    replace_file_id: Optional[int] = Form(None),
+    tenant_id: Optional[int] = Form(None),
     db: Session = Depends(get_db),
 ):
+    """
+    replace_file_id: new version of a file already in the knowledge base.
+    Only changed chunks are re-embedded and the existing file_id is kept.
+
+    update without replace_file_id never replaces by file name alone: if the
+    tenant has an earlier upload with the same name, 409 with its file_id so
+    the client can confirm by resending with replace_file_id; otherwise the
+    file is ingested as new.
+
+    tenant_id: owner of the file; its chunks are only found by QA requests
+    with the same tenant_id (or none).
+    """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
 
+    if replace_file_id is not None:
+        # another tenant's file counts as not found
+        to_replace = db.get(UploadedFile, replace_file_id)
+        if to_replace is None or to_replace.user_id != tenant_id:
+            raise HTTPException(status_code=404, detail="File to replace not found")
+
     service = BuildService(db)
-    saved_file = service.upload_file(file)
 
-    return {
-        "message": "File uploaded successfully",
+    if update and replace_file_id is None:
+        candidate = service.find_update_target(file.filename, tenant_id=tenant_id)
+        if candidate is not None:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "A file with this name exists: resend with replace_file_id to update it",
+                    "replace_file_id": candidate.id,
+                    "original_filename": candidate.original_filename,
+                    "uploaded_at": str(candidate.uploaded_at),
+                },
+            )
+
+    # only the save happens here; extract/chunk/embed run as an ingestion job
+    try:
+        saved_file, duplicate = service.save_upload(file, tenant_id=tenant_id)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedUploadTypeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    details = {
         "file_id": saved_file.id,
         "original_filename": saved_file.original_filename,
         "stored_filename": saved_file.stored_filename,
         "file_path": saved_file.file_path,
         "content_type": saved_file.content_type,
+        "content_hash": saved_file.content_hash,
         "uploaded_at": saved_file.uploaded_at,
+        "ingested_at": saved_file.ingested_at,
+    }
+
+    # byte-identical file is already in the knowledge base: nothing to ingest
+    if duplicate:
+        response.status_code = status.HTTP_200_OK
+        return {
+            "message": "Identical file already ingested",
+            "job_id": None,
+            "status": "duplicate",
+            "duplicate": True,
+            **details,
+        }
+
+    replaces = replace_file_id
+
+    job = ingestion_queue.enqueue(
+        db,
+        "file",
+        {"file_id": saved_file.id, "replaces_file_id": replaces},
+        user_id=tenant_id,
+    )
+    ingestion_worker.wake()
+
+    return {
+        "message": "File uploaded, ingestion queued",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/v1/ingestion-jobs/{job.id}",
+        "duplicate": False,
+        "replaces_file_id": replaces,
+        **details,
     }
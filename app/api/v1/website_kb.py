@@ -1,22 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_db
-from app.schemas.website_kb import WebsiteKBRequest, WebsiteKBResponse
-from app.services.website_kb_service import WebsiteKBService
+from app.schemas.website_kb import WebsiteKBRequest, WebsiteKBJobResponse
+from app.services.ingestion_queue import ingestion_queue, ingestion_worker
 
 router = APIRouter()
 
 
-@router.post("/knowledge-base/url", response_model=WebsiteKBResponse)
+@router.post(
+    "/knowledge-base/url",
+    response_model=WebsiteKBJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 def add_website_to_knowledge_base(
     payload: WebsiteKBRequest,
     db: Session = Depends(get_db),
 ):
+    # the crawl runs as an ingestion job; poll /ingestion-jobs/{job_id}
     try:
-        service = WebsiteKBService(db)
-        result = service.add_website(str(payload.url))
-        return result
+        url = str(payload.url).strip()
+        job = ingestion_queue.enqueue(
+            db,
+            "url",
+            {"url": url, "update": payload.update, "tenant_id": payload.tenant_id},
+            user_id=payload.tenant_id,
+        )
+        ingestion_worker.wake()
+
+        return {
+            "url": url,
+            "update": payload.update,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/v1/ingestion-jobs/{job.id}",
+        }
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,10 +1,14 @@
 # app/api/v1/websocket.py
 
+from contextlib import aclosing
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.websocket_manager import WebSocketManager
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal
 from app.models.chat import Chat
 from app.models.session import ConversationSession
+from app.schemas.qa import QARequest
+from app.services.qa_service import QAService
 
 router = APIRouter()
 
@@ -60,6 +64,37 @@ async def user_ws(websocket: WebSocket, sess_id: int):
                 # ❌ No broadcasting
                 # ❌ No sending to unassigned agents
 
+            # ==============================
+            # BOT QUESTION (streamed answer)
+            # ==============================
+            elif data.get("type") == "question":
+                question = data.get("question", "").strip()
+                if not question:
+                    continue
+
+                async with AsyncSessionLocal() as db:
+                    try:
+                        request = QARequest(
+                            question=question, user_id=sess_id, **(data.get("filters") or {})
+                        )
+                        # closed on disconnect too: ask_stream then saves
+                        # the question and the partial answer
+                        async with aclosing(
+                            QAService(db).ask_stream(
+                                question,
+                                sess_id,
+                                filters=request.search_filters(),
+                            )
+                        ) as stream:
+                            async for event in stream:
+                                await websocket.send_json(event)
+
+                    except WebSocketDisconnect:
+                        raise
+
+                    except Exception as e:
+                        await websocket.send_json({"type": "error", "message": str(e)})
+
     except WebSocketDisconnect:
         WebSocketManager.disconnect(websocket)
 
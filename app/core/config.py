@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     # ===============================
     DATABASE_URL: str  # MUST come from .env
 
+    # async (asyncpg) engine for the /qa path; derived from DATABASE_URL if unset
+    ASYNC_DATABASE_URL: Optional[str] = None
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 40
+
     # ===============================
     # FILE UPLOADS
     # ===============================
@@ -25,7 +30,37 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = str(BASE_DIR / "uploads")
 
     MAX_UPLOAD_SIZE_BYTES: int = 25 * 1024 * 1024  # fallback
-    ALLOWED_UPLOAD_TYPES: str = "application/pdf"
+    # comma separated; the types file_text_extractor.py can read
+    ALLOWED_UPLOAD_TYPES: str = (
+        "application/pdf,"
+        "text/plain,"
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    )
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # streamed to disk (and hashed) in these steps
+    UPLOAD_SKIP_DUPLICATES: bool = True  # byte-identical, already ingested file -> no new job
+
+    # ===============================
+    # INGESTION JOBS (uploads / crawls, see ingestion_queue.py)
+    # ===============================
+    # False when a separate `python -m app.worker` process does the work
+    INGESTION_WORKER_IN_PROCESS: bool = True
+    INGESTION_WORKER_CONCURRENCY: int = 2  # jobs processed at once per process
+    INGESTION_POLL_SECONDS: float = 2.0
+    INGESTION_JOB_STALE_SECONDS: int = 600  # running without a heartbeat -> re-queued
+    INGESTION_JOB_MAX_ATTEMPTS: int = 3
+
+    # streaming extract -> chunk -> embed -> insert pipeline
+    INGEST_EMBED_BATCH_CHUNKS: int = 64  # chunks embedded + inserted (and committed) together
+    INGEST_PIPELINE_QUEUE_CHUNKS: int = 256  # chunks buffered ahead of the embedder
+    INGEST_SEGMENT_CHARS: int = 32_000  # text tokenized per CPU pool task
+    # extracted text is kept on uploaded_files.text_content only up to this size
+    UPLOADED_FILE_TEXT_MAX_CHARS: int = 1_000_000
+
+    # ===============================
+    # CPU POOL (extraction / HTML parsing / chunking, see cpu_pool.py)
+    # ===============================
+    CPU_POOL_WORKERS: Optional[int] = None  # None = cpu_count - 1, 0 = run inline
+    CPU_POOL_PDF_PAGES_PER_TASK: int = 20  # PDF pages extracted per pool task
 
     # ===============================
     # JWT / AUTH
@@ -42,6 +77,117 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4o-mini"
     EMBEDDING_MODEL: str = "text-embedding-3-small"
 
+    # per-request limits for batched embedding calls
+    EMBEDDING_BATCH_MAX_INPUTS: int = 2048
+    EMBEDDING_BATCH_MAX_TOKENS: int = 300_000
+
+    # content-addressed embedding cache (in-process LRU + embedding_cache table)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 10_000
+    EMBEDDING_CACHE_MAX_ROWS: int = 1_000_000
+    EMBEDDING_CACHE_EVICT_EVERY: int = 1_000  # cache writes between eviction passes
+
+    # question -> query embedding cache on the /qa hot path
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 5_000
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: int = 24 * 3600
+    QUERY_EMBEDDING_CACHE_SHARED: bool = False  # also use the embedding_cache table
+
+    # ===============================
+    # VECTOR SEARCH (pgvector ANN)
+    # ===============================
+    # "hnsw" | "ivfflat" — read by the ANN index migration
+    VECTOR_INDEX_TYPE: str = "hnsw"
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    IVFFLAT_LISTS: int = 100
+
+    # per-query recall/latency knobs (higher = better recall, slower)
+    HNSW_EF_SEARCH: int = 40
+    IVFFLAT_PROBES: int = 10
+
+    # two-stage search: shortlist on a compact index, re-rank exactly
+    # "none" | "halfvec" | "binary" | "matryoshka" — also read by the
+    # quantized / shortened index migrations
+    VECTOR_SHORTLIST: str = "none"
+    VECTOR_SHORTLIST_SIZE: int = 100
+
+    # leading dims kept in file_embeddings.embedding_short (fixed by migration)
+    EMBEDDING_SHORT_DIMENSIONS: int = 256
+
+    # filtered searches: "relaxed_order" | "strict_order" | "off" (pgvector >= 0.8,
+    # detected at runtime). Without it (older pgvector, or "off") filtered
+    # searches scan VECTOR_FILTERED_SCAN_FACTOR times more candidates instead
+    VECTOR_ITERATIVE_SCAN: Optional[str] = "relaxed_order"
+    VECTOR_FILTERED_SCAN_FACTOR: int = 4
+
+    # "pgvector" | "numpy" (in-process brute force, see local_vector_index.py)
+    VECTOR_SEARCH_BACKEND: str = "pgvector"
+    LOCAL_VECTOR_INDEX_DTYPE: str = "float32"  # float32 | float16
+    LOCAL_VECTOR_INDEX_DIR: Optional[str] = None  # memmap files, default: system temp
+    LOCAL_VECTOR_INDEX_REFRESH_SECONDS: int = 30
+    # ids commit out of order: each refresh re-checks this many ids below the
+    # highest loaded one, and every RECONCILE_SECONDS all ids are compared
+    LOCAL_VECTOR_INDEX_LOOKBACK_IDS: int = 10000
+    LOCAL_VECTOR_INDEX_RECONCILE_SECONDS: int = 3600
+
+    # "vector" | "hybrid" (full-text + ANN fused with reciprocal-rank fusion)
+    RETRIEVAL_MODE: str = "vector"
+    HYBRID_CANDIDATES: int = 20  # candidates taken from each ranking
+    RRF_K: int = 60
+
+    # shared OpenAI HTTP clients (app/core/openai_client.py)
+    OPENAI_BASE_URL: Optional[str] = None  # None = api.openai.com
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    OPENAI_HTTP2: bool = False  # needs the h2 package
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OPENAI_MAX_RETRIES: int = 2
+
+    # latency budget of one /qa turn (embedding -> answer). When it runs out
+    # the user gets the best KB chunk verbatim instead of an LLM answer
+    QA_DEADLINE_SECONDS: float = 20.0
+    QA_LLM_TIMEOUT_SECONDS: float = 15.0  # per chat completion attempt
+    QA_EXTRACTIVE_MAX_CHARS: int = 1200
+    # hedged requests: a second identical completion is sent once the first
+    # is slower than the recent QA_HEDGE_PERCENTILE latency (costs tokens)
+    QA_HEDGE_ENABLED: bool = False
+    QA_HEDGE_PERCENTILE: float = 95.0
+    QA_HEDGE_MIN_SAMPLES: int = 50  # completions observed before hedging
+    QA_LATENCY_WINDOW: int = 500
+
+    # curated kb_qa answers returned verbatim (no LLM call) on an exact
+    # normalised-question match or above FAQ_MIN_SIMILARITY
+    FAQ_FAST_PATH_ENABLED: bool = True
+    FAQ_MIN_SIMILARITY: float = 0.9
+
+    # semantic answer cache: reuse an answer when a new question is within
+    # ANSWER_CACHE_MAX_DISTANCE (cosine) of a cached one, same KB version
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_DISTANCE: float = 0.05
+    ANSWER_CACHE_MAX_ROWS: int = 50_000
+    ANSWER_CACHE_EVICT_EVERY: int = 500  # cache writes between eviction passes
+    # hnsw.ef_search for the lookup: the HNSW candidates are post-filtered on
+    # kb_version and scope (pgvector < 0.8, or VECTOR_ITERATIVE_SCAN=off)
+    ANSWER_CACHE_EF_SEARCH: int = 200
+
+    # prompt assembly (tiktoken counts): KB chunks get up to QA_KB_TOKEN_BUDGET,
+    # recent turns verbatim fill the rest, older turns live in a rolling summary
+    QA_CONTEXT_TOKEN_BUDGET: int = 6000
+    QA_KB_TOKEN_BUDGET: int = 3000
+    QA_HISTORY_MAX_MESSAGES: int = 50  # unsummarised rows loaded per turn
+    QA_HISTORY_RECENT_MESSAGES: int = 8  # never folded into the summary
+    QA_SUMMARY_TRIGGER_MESSAGES: int = 16  # unsummarised rows before a refresh
+    QA_SUMMARY_MODEL: str = "gpt-4o-mini"
+    QA_SUMMARY_MAX_TOKENS: int = 400
+    QA_SUMMARY_INPUT_TOKEN_BUDGET: int = 4000
+
+    # chunks retrieved per question; select_relevant_chunks() trims them
+    QA_TOP_K: int = 5
+    RETRIEVAL_MIN_SIMILARITY: float = 0.25  # 1 - cosine distance
+    RETRIEVAL_MAX_SCORE_GAP: Optional[float] = 0.1  # None/0 disables adaptive k
+
     # ===============================
     # OPTIONAL STORAGE (AWS / Azure later)
     # ===============================
@@ -0,0 +1,106 @@
+# app/core/cpu_pool.py
+import os
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Optional
+
+from app.core.config import settings
+
+
+class CPUPool:
+    """
+    Application-scoped process pool for CPU-bound ingestion stages (PDF /
+    DOCX extraction, HTML parsing, tiktoken chunking), so they do not hold
+    the GIL of the process serving chat traffic.
+
+    Bounded: CPU_POOL_WORKERS processes (0 = run inline), and map() keeps at
+    most a few tasks per worker in flight. Processes are spawned, not forked:
+    the API process has threads (ingestion workers, DB pools) that a fork
+    would copy mid-state. Created lazily, closed on shutdown.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        if settings.CPU_POOL_WORKERS is not None:
+            return max(settings.CPU_POOL_WORKERS, 0)
+        # leave a core for the event loop / request threads
+        return max((os.cpu_count() or 2) - 1, 1)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    logging.info("CPU pool started (%s processes).", self.workers)
+        return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        # a worker died (OOM on a huge PDF, ...): the next call gets a new pool
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable, *args):
+        """fn(*args) in a worker process (inline when the pool is disabled)."""
+        if not self.workers:
+            return fn(*args)
+
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
+
+    def map(self, fn: Callable, args_list: Iterable[tuple], window: Optional[int] = None) -> Iterator:
+        """
+        fn(*args) for every args tuple, spread over the pool; results are
+        yielded in input order as soon as each is ready. At most `window`
+        tasks (default 2 per worker) are queued, so a long input does not
+        pile up results in memory.
+        """
+        if not self.workers:
+            for args in args_list:
+                yield fn(*args)
+            return
+
+        executor = self._get_executor()
+        window = window or self.workers * 2
+        pending = deque()
+
+        try:
+            for args in args_list:
+                pending.append(executor.submit(fn, *args))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
+        finally:
+            # consumer stopped early or a task failed
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+cpu_pool = CPUPool()
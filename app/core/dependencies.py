@@ -1,7 +1,7 @@
 # app/core/dependencies.py
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal
 from sqlalchemy.orm import Session
 from app.core.security import decode_token
 from app.models.user import User
@@ -16,6 +16,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     payload = decode_token(token)
     if not payload:
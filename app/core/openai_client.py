@@ -0,0 +1,159 @@
+# app/core/openai_client.py
+import os
+import logging
+import threading
+from typing import Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+from app.core.config import settings
+
+
+def openai_timeout(seconds: Optional[float] = None) -> httpx.Timeout:
+    """
+    Request timeout with OPENAI_CONNECT_TIMEOUT_SECONDS for the connect
+    phase. Pass this (not a float) as `timeout=` to the SDK, per client or
+    per call.
+    """
+    seconds = settings.OPENAI_TIMEOUT_SECONDS if seconds is None else seconds
+    return httpx.Timeout(seconds, connect=min(settings.OPENAI_CONNECT_TIMEOUT_SECONDS, seconds))
+
+
+class OpenAIClients:
+    """
+    Application-scoped OpenAI clients (one sync, one async) over pooled
+    httpx clients, so every request reuses warm keep-alive connections
+    instead of paying a new TLS handshake.
+
+    Created lazily on first use (or by startup()) and closed on shutdown.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync: Optional[OpenAI] = None
+        self._async: Optional[AsyncOpenAI] = None
+        self._sync_http: Optional[httpx.Client] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
+
+    # ===============================
+    # HTTP SETTINGS
+    # ===============================
+
+    def _http_kwargs(self) -> dict:
+        http2 = settings.OPENAI_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logging.warning("OPENAI_HTTP2 is set but the h2 package is missing; using HTTP/1.1.")
+                http2 = False
+
+        return {
+            "http2": http2,
+            "limits": httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            "timeout": openai_timeout(),
+        }
+
+    def _client_kwargs(self) -> dict:
+        return {
+            "api_key": os.getenv("OPENAI_API_KEY"),
+            "base_url": settings.OPENAI_BASE_URL,
+            "max_retries": settings.OPENAI_MAX_RETRIES,
+            # the SDK's timeout replaces the http client's: a bare float
+            # would apply to the connect phase too
+            "timeout": openai_timeout(),
+        }
+
+    # ===============================
+    # CLIENTS
+    # ===============================
+
+    @property
+    def sync(self) -> OpenAI:
+        if self._sync is None:
+            with self._lock:
+                if self._sync is None:
+                    self._sync_http = httpx.Client(**self._http_kwargs())
+                    self._sync = OpenAI(http_client=self._sync_http, **self._client_kwargs())
+        return self._sync
+
+    @property
+    def async_(self) -> AsyncOpenAI:
+        if self._async is None:
+            with self._lock:
+                if self._async is None:
+                    self._async_http = httpx.AsyncClient(**self._http_kwargs())
+                    self._async = AsyncOpenAI(http_client=self._async_http, **self._client_kwargs())
+        return self._async
+
+    def startup(self):
+        # build both up front so the first request does not pay for it
+        self.sync
+        self.async_
+
+    async def shutdown(self):
+        with self._lock:
+            sync_client, async_client = self._sync, self._async
+            self._sync = self._async = None
+            self._sync_http = self._async_http = None
+
+        if async_client is not None:
+            await async_client.close()
+        if sync_client is not None:
+            sync_client.close()
+
+    # ===============================
+    # METRICS
+    # ===============================
+
+    @staticmethod
+    def _pool_stats(http_client) -> Optional[dict]:
+        # httpx keeps its httpcore pool on the default transport (private API)
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        if pool is None:
+            return None
+
+        connections = list(pool.connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        http2 = sum(
+            1 for connection in connections
+            if type(getattr(connection, "_connection", None)).__name__.endswith("HTTP2Connection")
+        )
+        # requests waiting for a free connection (pool exhausted)
+        queued = sum(
+            1 for request in getattr(pool, "_requests", []) if getattr(request, "connection", None) is None
+        )
+        return {
+            "connections": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "http2": http2,
+            "queued_requests": queued,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "limits": {
+                "max_connections": settings.OPENAI_MAX_CONNECTIONS,
+                "max_keepalive_connections": settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                "keepalive_expiry_seconds": settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+            },
+            "sync": self._pool_stats(self._sync_http) if self._sync_http else None,
+            "async": self._pool_stats(self._async_http) if self._async_http else None,
+        }
+
+
+openai_clients = OpenAIClients()
+
+
+def get_openai_client() -> OpenAI:
+    return openai_clients.sync
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    return openai_clients.async_
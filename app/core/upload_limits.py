@@ -0,0 +1,49 @@
+# app/core/upload_limits.py
+from app.core.config import settings
+
+# multipart boundaries / part headers on top of the file bytes
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects upload requests whose Content-Length is already over
+    MAX_UPLOAD_SIZE_BYTES with 413, before the multipart body is read and
+    spooled to disk. Uploads without a Content-Length (chunked) are still
+    cut off by BuildService while streaming.
+
+    Plain ASGI (not BaseHTTPMiddleware) so streaming responses are untouched.
+    """
+
+    def __init__(self, app, paths: tuple):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths:
+            limit = settings.MAX_UPLOAD_SIZE_BYTES + _MULTIPART_OVERHEAD_BYTES
+            for name, value in scope["headers"]:
+                if name == b"content-length" and value.isdigit() and int(value) > limit:
+                    await self._reject(send)
+                    return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send):
+        body = (
+            b'{"detail":"File is larger than the '
+            + str(settings.MAX_UPLOAD_SIZE_BYTES // (1024 * 1024)).encode()
+            + b' MB limit"}'
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
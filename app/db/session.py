@@ -1,6 +1,8 @@
 # app/db/session.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
@@ -18,3 +20,32 @@ SessionLocal = sessionmaker(
     autoflush=False,
     bind=engine
 )
+
+
+# ===============================
+# ASYNC (asyncpg) — used by the /qa hot path
+# ===============================
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    # same database, asyncpg driver (postgresql+psycopg2://... -> postgresql+asyncpg://...)
+    return make_url(str(settings.DATABASE_URL)).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+async_engine = create_async_engine(
+    _async_database_url(),
+    pool_size=settings.ASYNC_DB_POOL_SIZE,
+    max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
@@ -0,0 +1,147 @@
+# app/devtools/slow_openai.py
+
+"""
+Stand-in OpenAI server for exercising QA deadlines / hedging offline.
+
+    SLOW_OPENAI_DELAY=8 SLOW_OPENAI_JITTER=4 \
+        uvicorn app.devtools.slow_openai:app --port 9000
+
+    OPENAI_BASE_URL=http://localhost:9000/v1 OPENAI_API_KEY=sk-test ...
+
+SLOW_OPENAI_DELAY   seconds before a chat completion starts answering
+SLOW_OPENAI_JITTER  extra random delay (0..JITTER), gives hedging a tail
+SLOW_OPENAI_TOKEN_DELAY  seconds between streamed tokens
+SLOW_OPENAI_EMBEDDING_DELAY  seconds before an embeddings response
+
+An X-Slow-Delay request header overrides SLOW_OPENAI_DELAY per call.
+"""
+
+import os
+import json
+import time
+import asyncio
+import base64
+import random
+import hashlib
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Slow OpenAI stand-in")
+
+DELAY = float(os.getenv("SLOW_OPENAI_DELAY", "5"))
+JITTER = float(os.getenv("SLOW_OPENAI_JITTER", "0"))
+TOKEN_DELAY = float(os.getenv("SLOW_OPENAI_TOKEN_DELAY", "0.05"))
+EMBEDDING_DELAY = float(os.getenv("SLOW_OPENAI_EMBEDDING_DELAY", "0"))
+
+ANSWER = "This is a canned answer from the slow OpenAI stand-in server."
+
+
+def _delay(request: Request) -> float:
+    base = float(request.headers.get("x-slow-delay", DELAY))
+    return base + random.uniform(0, JITTER)
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _fake_embedding(text_value: str, dimensions: int, encoding_format: str):
+    # deterministic per input, so repeated questions still hit caches
+    seed = int.from_bytes(hashlib.sha256(text_value.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+
+    # the SDK asks for base64 unless encoding_format="float" is passed
+    if encoding_format == "base64":
+        return base64.b64encode(vector.tobytes()).decode("ascii")
+    return vector.tolist()
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+    words = ANSWER.split(" ")
+    created = int(time.time())
+    completion_id = f"chatcmpl-slow-{created}"
+
+    await asyncio.sleep(_delay(request))
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": ANSWER},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": _usage(prompt_tokens, len(words)),
+        }
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+    async def events():
+        for position, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": word if position == 0 else " " + word},
+                        "finish_reason": None,
+                    }
+                ],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(TOKEN_DELAY)
+
+        if include_usage:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [],
+                "usage": _usage(prompt_tokens, len(words)),
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body.get("input")
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dimensions = int(body.get("dimensions") or 1536)
+    encoding_format = body.get("encoding_format") or "float"
+
+    await asyncio.sleep(EMBEDDING_DELAY)
+
+    return {
+        "object": "list",
+        "model": body.get("model"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": _fake_embedding(str(text_value), dimensions, encoding_format)}
+            for i, text_value in enumerate(inputs)
+        ],
+        "usage": _usage(sum(len(str(t).split()) for t in inputs), 0),
+    }
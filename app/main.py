@@ -13,11 +13,18 @@ from app.core.logging import configure_logging
 from app.core.config import settings
 from app.api.api_router import api_router
 from app.db import init_db
+from app.core.openai_client import openai_clients
+from app.core.cpu_pool import cpu_pool
+from app.core.upload_limits import UploadSizeLimitMiddleware
+from app.services.ingestion_queue import ingestion_worker
 
 configure_logging()
 
 app = FastAPI(title="Case AI Backend", version="0.1.0")
 
+# added first = innermost: its 413 still gets CORS headers
+app.add_middleware(UploadSizeLimitMiddleware, paths=("/api/v1/upload/upload-file",))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # 🔥 dev only
@@ -36,3 +43,15 @@ app.include_router(websocket_router)
 def startup_event():
     logging.info("Starting up: initializing DB...")
     init_db.init_extensions()
+    openai_clients.startup()
+
+    # uploads / crawls; disable when `python -m app.worker` runs separately
+    if settings.INGESTION_WORKER_IN_PROCESS:
+        ingestion_worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    ingestion_worker.stop(timeout=5)
+    cpu_pool.shutdown()
+    await openai_clients.shutdown()
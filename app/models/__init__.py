@@ -3,4 +3,8 @@ from app.models.refresh_token import RefreshToken
 from app.models.chat import Chat
 from app.models.uploaded_file import UploadedFile
 from app.models.file_embedding import FileEmbedding
-from app.models.session import ConversationSession
\ No newline at end of file
+from app.models.session import ConversationSession
+from app.models.embedding_cache import CachedEmbedding
+from app.models.conversation_summary import ConversationSummary
+from app.models.answer_cache import CachedAnswer
+from app.models.ingestion_job import IngestionJob
@@ -0,0 +1,26 @@
+# app/models/answer_cache.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger
+from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
+from app.db.base import Base
+
+
+class CachedAnswer(Base):
+    __tablename__ = "answer_cache"
+
+    id = Column(Integer, primary_key=True)
+
+    question = Column(Text, nullable=False)
+    question_embedding = Column(Vector(1536), nullable=False)
+    answer = Column(Text, nullable=False)
+
+    # kb_version_seq value the answer was generated against
+    kb_version = Column(BigInteger, nullable=False, index=True)
+
+    # sha256 of the retrieval filters ("" = unfiltered) so tenants never share answers
+    scope = Column(String(64), nullable=False, default="")
+
+    hits = Column(Integer, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
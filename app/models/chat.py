@@ -1,5 +1,5 @@
 # app/models/chat.py
-from sqlalchemy import Column, Integer, Text, DateTime, Boolean, Enum as SAEnum, BigInteger
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum as SAEnum, BigInteger
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -35,4 +35,7 @@ class Chat(Base):
     completion_tokens = Column(Integer, default=0)
     total_tokens = Column(Integer, default=0)
 
+    # bot messages only: 'llm' | 'faq' | 'cache' | 'extractive' | 'partial' (analytics)
+    answer_source = Column(String(20), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
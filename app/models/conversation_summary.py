@@ -0,0 +1,24 @@
+# app/models/conversation_summary.py
+from sqlalchemy import Column, Integer, Text, DateTime, BigInteger
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+
+    id = Column(Integer, primary_key=True)
+
+    # one rolling summary per conversation
+    sess_id = Column(BigInteger, nullable=False, unique=True, index=True)
+
+    summary = Column(Text, nullable=False, default="")
+
+    # highest chats.id folded into the summary; newer turns are sent verbatim
+    last_chat_id = Column(Integer, nullable=False, default=0)
+
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,22 @@
+# app/models/embedding_cache.py
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
+from app.db.base import Base
+
+
+class CachedEmbedding(Base):
+    __tablename__ = "embedding_cache"
+
+    # sha256(model, dimensions, normalised text)
+    key = Column(String(64), primary_key=True)
+
+    model = Column(String(100), nullable=False)
+    dimensions = Column(Integer, nullable=False, default=0)  # 0 = model default
+
+    # no fixed size: `dimensions` may differ between entries
+    embedding = Column(Vector(), nullable=False)
+    tokens = Column(Integer, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
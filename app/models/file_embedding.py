@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Float, Integer, ForeignKey, DateTime, String, Text,BigInteger
+from sqlalchemy import Column, Float, Integer, ForeignKey, DateTime, String, Text,BigInteger, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -17,7 +18,21 @@ class FileEmbedding(Base):
     # OpenAI embedding vector (e.g. 1536 dims for text-embedding-3-small)
     
     embedding = Column(Vector(1536), nullable=False)
+    # truncated + re-normalised copy (EMBEDDING_SHORT_DIMENSIONS, set by migration)
+    embedding_short = Column(Vector(), nullable=True)
     source_type = Column(String(50), nullable=True, default="file")
     embedding_tokens = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    source_url = Column(Text, nullable=True)
\ No newline at end of file
+    source_url = Column(Text, nullable=True)
+
+    # kb_qa rows only: sha256 of the normalised question (FAQ fast path)
+    question_hash = Column(String(64), nullable=True, index=True)
+
+    # sha256 of text_content: re-ingesting a file / site only embeds new chunks
+    content_hash = Column(String(64), nullable=True)
+
+    # maintained by Postgres, used for the lexical half of hybrid search
+    text_search = Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(text_content, ''))", persisted=True),
+    )
\ No newline at end of file
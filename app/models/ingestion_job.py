@@ -0,0 +1,42 @@
+# app/models/ingestion_job.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True)
+
+    # "file" (payload: file_id) | "url" (payload: url, max_pages, max_depth)
+    kind = Column(String(20), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+
+    # queued -> running -> done | failed (stale running jobs are re-queued)
+    status = Column(String(20), nullable=False, default="queued", server_default="queued")
+    progress = Column(Integer, nullable=False, default=0, server_default="0")  # percent
+    progress_message = Column(String(255), nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    worker_id = Column(String(100), nullable=True)
+    user_id = Column(BigInteger, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # heartbeat: bumped on every progress update while running
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # claim query: oldest queued job first
+        Index(
+            "ix_ingestion_jobs_queued",
+            "created_at",
+            postgresql_where=(status == "queued"),
+        ),
+        Index("ix_ingestion_jobs_status", "status"),
+    )
@@ -6,10 +6,13 @@ class ConversationSession(Base):
     __tablename__ = "conversation_sessions"
 
     id = Column(Integer, primary_key=True, index=True)
-    sess_id = Column(BigInteger, index=True, nullable=False)
+    sess_id = Column(BigInteger, index=True, unique=True, nullable=False)
 
     status = Column(String, default="bot_active")  
-    # bot_active | agent_active | closed
+    # bot_active | pending_agent | agent_active | closed
+
+    # "I don't know" answers so far; the 6th one requests a human agent
+    failure_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     assigned_agent_id = Column(Integer, nullable=True)
 
@@ -16,4 +16,11 @@ class UploadedFile(Base):
     text_content = Column(Text, nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     source_type = Column(String(50), nullable=True, default="file")
-    user_id = Column(BigInteger, nullable=True)
\ No newline at end of file
+    user_id = Column(BigInteger, nullable=True)
+
+    # sha256 of the stored bytes, computed while streaming the upload
+    content_hash = Column(String(64), nullable=True, index=True)
+
+    # set when ingest_file has finished; chunks of a running / failed
+    # ingestion can already be committed, so embeddings alone prove nothing
+    ingested_at = Column(DateTime(timezone=True), nullable=True)
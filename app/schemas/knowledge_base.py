@@ -4,6 +4,7 @@ from typing import Optional, List
 class KnowledgeBaseQARequest(BaseModel):
     question: str
     answer: str
+    tenant_id: Optional[int] = None  # owner, file_embeddings.user_id
 
 
 class KnowledgeBaseQAResponse(BaseModel):
@@ -0,0 +1,27 @@
+# app/schemas/qa.py
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class QARequest(BaseModel):
+    question: str
+    # conversation (session) id — kept as user_id for existing clients
+    user_id: int
+
+    # optional retrieval filters
+    source_types: Optional[List[str]] = None  # file | kb_url | kb_qa
+    file_ids: Optional[List[int]] = None
+    url_ids: Optional[List[int]] = None
+    qa_ids: Optional[List[int]] = None
+    # only chunks ingested with this tenant_id (file_embeddings.user_id)
+    tenant_id: Optional[int] = None
+
+    def search_filters(self) -> dict:
+        filters = {
+            "source_types": self.source_types,
+            "file_ids": self.file_ids,
+            "url_ids": self.url_ids,
+            "qa_ids": self.qa_ids,
+            "user_id": self.tenant_id,
+        }
+        return {key: value for key, value in filters.items() if value is not None}
@@ -1,12 +1,26 @@
+from typing import Optional
+
 from pydantic import BaseModel, HttpUrl
 
 
 class WebsiteKBRequest(BaseModel):
     url: HttpUrl
+    # re-crawl: diff against the previous crawl of this URL instead of adding a copy
+    update: bool = False
+    # owner of the crawled chunks (file_embeddings.user_id), see QARequest.tenant_id
+    tenant_id: Optional[int] = None
 
 
 class WebsiteKBResponse(BaseModel):
     url: str
     total_text_length: int
     chunks_created: int
-    rows_inserted: int
\ No newline at end of file
+    rows_inserted: int
+
+
+class WebsiteKBJobResponse(BaseModel):
+    url: str
+    update: bool
+    job_id: int
+    status: str
+    status_url: str
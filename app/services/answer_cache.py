@@ -0,0 +1,132 @@
+# app/services/answer_cache.py
+
+import json
+import hashlib
+from typing import Optional
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from pgvector.sqlalchemy import Vector
+
+from app.core.config import settings
+from app.services.pgvector_capabilities import MAX_EF_SEARCH, pgvector_capabilities
+
+# current knowledge base version (bumped by invalidate())
+KB_VERSION_SQL = "(SELECT last_value FROM kb_version_seq)"
+
+
+def answer_cache_scope(filters: Optional[dict]) -> str:
+    # answers retrieved under different filters (tenants, sources) never mix
+    if not filters:
+        return ""
+    raw = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    Semantic answer cache (answer_cache table).
+
+    lookup -> nearest cached question (HNSW, cosine) for the current KB
+              version and scope, served if within ANSWER_CACHE_MAX_DISTANCE
+    store  -> adds (question embedding, answer, KB version it was built on)
+    evict  -> keeps the ANSWER_CACHE_MAX_ROWS most recently used rows
+
+    Every KB change bumps kb_version_seq and drops older answers, see
+    invalidate().
+    """
+
+    def __init__(self):
+        self._writes_since_evict = 0
+
+    async def lookup(self, db: AsyncSession, query_embedding, scope: str = "") -> Optional[dict]:
+        if not settings.ANSWER_CACHE_ENABLED or not query_embedding:
+            return None
+
+        # old KB versions and other scopes share the index: without an
+        # iterative scan, every HNSW candidate could be filtered out
+        await pgvector_capabilities.aload(db)
+        ef_search = min(settings.ANSWER_CACHE_EF_SEARCH, MAX_EF_SEARCH)
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if pgvector_capabilities.iterative_scan_mode():
+            # strict: LIMIT 1 must be the true nearest match
+            await db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+
+        sql = text(f"""
+            SELECT id, question, answer, question_embedding <=> :embedding AS distance
+            FROM answer_cache
+            WHERE kb_version = {KB_VERSION_SQL} AND scope = :scope
+            ORDER BY question_embedding <=> :embedding
+            LIMIT 1
+        """).bindparams(bindparam("embedding", type_=Vector(1536)))
+
+        row = (await db.execute(sql, {"embedding": query_embedding, "scope": scope})).first()
+        if row is None or row.distance > settings.ANSWER_CACHE_MAX_DISTANCE:
+            return None
+
+        await db.execute(
+            text("UPDATE answer_cache SET hits = hits + 1, last_used_at = now() WHERE id = :id"),
+            {"id": row.id},
+        )
+        return dict(row._mapping)
+
+    async def store(
+        self,
+        db: AsyncSession,
+        question: str,
+        query_embedding,
+        answer: str,
+        kb_version: int,
+        scope: str = "",
+    ):
+        """
+        Written through the caller's session, committed with it.
+
+        kb_version is the version read before retrieval: if the KB changed
+        while the answer was generated, it is stored under the old version
+        and never served.
+        """
+        if not settings.ANSWER_CACHE_ENABLED or not query_embedding:
+            return
+
+        await db.execute(
+            text("""
+                INSERT INTO answer_cache (question, question_embedding, answer, kb_version, scope, hits)
+                VALUES (:question, :embedding, :answer, :kb_version, :scope, 0)
+            """).bindparams(bindparam("embedding", type_=Vector(1536))),
+            {
+                "question": question,
+                "embedding": query_embedding,
+                "answer": answer,
+                "kb_version": kb_version,
+                "scope": scope,
+            },
+        )
+
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= settings.ANSWER_CACHE_EVICT_EVERY:
+            self._writes_since_evict = 0
+            await db.execute(
+                text("""
+                    DELETE FROM answer_cache
+                    WHERE id IN (
+                        SELECT id FROM answer_cache
+                        ORDER BY last_used_at DESC
+                        OFFSET :max_rows
+                    )
+                """),
+                {"max_rows": settings.ANSWER_CACHE_MAX_ROWS},
+            )
+
+    def invalidate(self, db: Session):
+        """
+        Knowledge base changed: bump the version and drop answers built on
+        older versions. Commits.
+        """
+        version = db.execute(text("SELECT nextval('kb_version_seq')")).scalar_one()
+        db.execute(text("DELETE FROM answer_cache WHERE kb_version < :version"), {"version": version})
+        db.commit()
+
+
+answer_cache = AnswerCache()
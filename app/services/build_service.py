@@ -1,71 +1,316 @@
 import os
 import uuid
-import shutil
+import logging
+import hashlib
+import mimetypes
+from typing import Callable, Optional, Tuple
 from fastapi import UploadFile
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 
+from app.core.config import settings
 from app.models.uploaded_file import UploadedFile
-from app.models.file_embedding import FileEmbedding
+from app.services.chunk_sync import sync_chunks
 from app.services.embedding_service import EmbeddingService
-from app.services.file_text_extractor import extract_text_from_file
-from app.services.website_kb_service import WebsiteKBService
+from app.services.file_text_extractor import iter_text_from_file
+from app.services.ingestion_pipeline import iter_chunks
+from app.services.vector_search import notify_embeddings_changed
+from app.utils.prefetch import prefetch
 
 UPLOAD_DIR = "uploads"
 
+# leading bytes every file of the type starts with (docx is a zip)
+_MAGIC_BYTES = {
+    "application/pdf": (b"%PDF-",),
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (b"PK\x03\x04",),
+}
+
+
+class UploadTooLargeError(ValueError):
+    """Upload exceeds MAX_UPLOAD_SIZE_BYTES (HTTP 413)."""
+
+
+class UnsupportedUploadTypeError(ValueError):
+    """Upload type not in ALLOWED_UPLOAD_TYPES or content does not match it (HTTP 415)."""
+
+
+def allowed_upload_types() -> set:
+    return {t.strip().lower() for t in settings.ALLOWED_UPLOAD_TYPES.split(",") if t.strip()}
+
+
+def resolve_upload_type(filename: str, content_type: Optional[str]) -> str:
+    """
+    Declared content type if allowed, else the one implied by the extension
+    (browsers send application/octet-stream for .docx / .txt quite often).
+    """
+    allowed = allowed_upload_types()
+    declared = (content_type or "").split(";")[0].strip().lower()
+    if declared in allowed:
+        return declared
+
+    guessed, _ = mimetypes.guess_type(filename or "")
+    if guessed and guessed.lower() in allowed:
+        return guessed.lower()
+
+    raise UnsupportedUploadTypeError(
+        f"Unsupported file type: {declared or 'unknown'}. Allowed: {', '.join(sorted(allowed))}"
+    )
+
+
+def _check_magic(content_type: str, head: bytes):
+    prefixes = _MAGIC_BYTES.get(content_type)
+    if prefixes and not head.startswith(prefixes):
+        raise UnsupportedUploadTypeError(f"File content does not look like {content_type}")
+    if content_type == "text/plain" and b"\x00" in head:
+        raise UnsupportedUploadTypeError("File content does not look like text/plain")
+
 
 class BuildService:
     def __init__(self, db: Session):
         self.db = db
-        self.embedding_service = EmbeddingService()
-        self.wks=WebsiteKBService(db)
+        self.embedding_service = EmbeddingService(db)
+
+    # =========================================================
+    # SAVE (in the request) -> INGEST (ingestion worker)
+    # =========================================================
+    def _stream_to_disk(self, file: UploadFile, file_path: str, content_type: str) -> Tuple[str, int]:
+        """
+        Copy the upload in UPLOAD_CHUNK_BYTES steps, hashing as it goes.
+        Stops at the first chunk over MAX_UPLOAD_SIZE_BYTES or with content
+        that does not match the type; the partial file is removed.
+        Returns (sha256 hex, size).
+        """
+        max_bytes = settings.MAX_UPLOAD_SIZE_BYTES
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(file_path, "wb") as buffer:
+                while True:
+                    chunk = file.file.read(settings.UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+
+                    if size == 0:
+                        _check_magic(content_type, chunk)
+
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(
+                            f"File is larger than the {max_bytes // (1024 * 1024)} MB limit"
+                        )
+
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except Exception:
+            os.remove(file_path)
+            raise
+
+        if size == 0:
+            os.remove(file_path)
+            raise ValueError("Uploaded file is empty")
+
+        return digest.hexdigest(), size
+
+    def find_ingested_duplicate(self, content_hash: str, tenant_id: Optional[int] = None) -> Optional[UploadedFile]:
+        # byte-identical upload of the same tenant whose ingestion finished
+        return (
+            self.db.query(UploadedFile)
+            .filter(
+                UploadedFile.content_hash == content_hash,
+                UploadedFile.ingested_at.isnot(None),
+                UploadedFile.user_id.is_(None) if tenant_id is None else UploadedFile.user_id == tenant_id,
+            )
+            .order_by(UploadedFile.id)
+            .first()
+        )
+
+    def save_upload(self, file: UploadFile, tenant_id: Optional[int] = None) -> Tuple[UploadedFile, bool]:
+        """
+        tenant_id: owner of the file and its chunks (user_id columns).
+
+        Returns (uploaded_file, is_duplicate). With UPLOAD_SKIP_DUPLICATES a
+        byte-identical, already ingested file is returned instead of a new
+        row (nothing is kept on disk for the new upload).
+        """
+        content_type = resolve_upload_type(file.filename, file.content_type)
 
-    def upload_file(self, file: UploadFile):
         os.makedirs(UPLOAD_DIR, exist_ok=True)
 
         ext = os.path.splitext(file.filename)[1]
         unique_name = f"{uuid.uuid4().hex}{ext}"
         file_path = os.path.join(UPLOAD_DIR, unique_name)
 
-        # save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # save file (chunked, hashed, size-limited)
+        content_hash, _ = self._stream_to_disk(file, file_path, content_type)
 
-        # extract text
-        text_content = extract_text_from_file(file_path, file.content_type)
+        if settings.UPLOAD_SKIP_DUPLICATES:
+            existing = self.find_ingested_duplicate(content_hash, tenant_id)
+            if existing is not None:
+                os.remove(file_path)
+                return existing, True
 
-        # save file metadata
+        # save file metadata (text is filled in by ingest_file)
         db_file = UploadedFile(
             original_filename=file.filename,
             stored_filename=unique_name,
             file_path=file_path,
-            content_type=file.content_type,
-            text_content=text_content,
+            content_type=content_type,
             source_type="file",
+            content_hash=content_hash,
+            user_id=tenant_id,
         )
 
         self.db.add(db_file)
         self.db.commit()
         self.db.refresh(db_file)
 
-        # create embeddings (CHUNKED)
-        chunks = self.wks._chunk_text(text_content)
-        print(chunks,"---chunks---")
-        for chunk in chunks:
-            embedding_vector, tokens_used = self.embedding_service.create_embedding(chunk)
-
-            if not embedding_vector:
-                continue
-
-            db_embedding = FileEmbedding(
-                file_id=db_file.id,
-                embedding=embedding_vector,
-                text_content=chunk,
-                source_type="file",
-                embedding_tokens=tokens_used,
+        return db_file, False
+
+    def find_update_target(
+        self,
+        original_filename: str,
+        exclude_id: Optional[int] = None,
+        tenant_id: Optional[int] = None,
+    ) -> Optional[UploadedFile]:
+        # update candidate: the same tenant's latest upload with the same file
+        # name, only offered to the client (never replaced without replace_file_id)
+        query = self.db.query(UploadedFile).filter(
+            UploadedFile.original_filename == original_filename,
+            UploadedFile.user_id.is_(None) if tenant_id is None else UploadedFile.user_id == tenant_id,
+        )
+        if exclude_id is not None:
+            query = query.filter(UploadedFile.id != exclude_id)
+        return query.order_by(UploadedFile.id.desc()).first()
+
+    def ingest_file(
+        self,
+        file_id: int,
+        replaces_file_id: Optional[int] = None,
+        progress: Optional[Callable[[int, str], None]] = None,
+    ) -> dict:
+        """
+        Extract, chunk, embed and insert a saved upload as a stream: pages /
+        paragraphs flow through the chunker into embedding batches, so memory
+        stays flat whatever the document size, and a new file's first chunks
+        are committed (searchable) while the rest is still being processed.
+
+        replaces_file_id: update mode. The upload becomes the new version of
+        that file: its chunks are diffed by content hash against the old
+        version (only new / changed chunks are embedded, removed ones deleted)
+        and the old file_id is kept, in one transaction.
+
+        progress(percent, message) is called between stages.
+        """
+        progress = progress or (lambda percent, message: None)
+
+        db_file = self.db.get(UploadedFile, file_id)
+        if db_file is None:
+            raise ValueError(f"Uploaded file {file_id} not found")
+
+        target = db_file
+        if replaces_file_id is not None and replaces_file_id != file_id:
+            target = self.db.get(UploadedFile, replaces_file_id)
+            if target is None:
+                raise ValueError(f"Uploaded file {replaces_file_id} not found")
+
+        updating = target is not db_file
+        file_path, content_type, target_id = db_file.file_path, db_file.content_type, target.id
+        # chunks belong to the tenant owning the (target) file
+        tenant_id = target.user_id
+
+        # 1️⃣ extract (pages / paragraphs) -> 2️⃣ chunk -> 3️⃣ embed + insert per batch.
+        # Extraction and chunking run ahead on a thread, at most
+        # INGEST_PIPELINE_QUEUE_CHUNKS chunks ahead of the embedder.
+        text_length = 0
+        kept_text = []
+
+        def blocks():
+            nonlocal text_length
+            for block in iter_text_from_file(file_path, content_type):
+                text_length += len(block)
+                if text_length <= settings.UPLOADED_FILE_TEXT_MAX_CHARS:
+                    kept_text.append(block)
+                yield block
+
+        chunks = prefetch(
+            iter_chunks(blocks()),
+            maxsize=settings.INGEST_PIPELINE_QUEUE_CHUNKS,
+            name=f"ingest-file-{file_id}",
+        )
+
+        progress(5, "extracting and embedding")
+        try:
+            result = sync_chunks(
+                self.db,
+                self.embedding_service,
+                source_filter={"file_id": target_id},
+                chunks=chunks,
+                row_fields={"file_id": target_id, "source_type": "file", "user_id": tenant_id},
+                # a new file becomes searchable batch by batch; an update stays one transaction
+                commit_batches=not updating,
+                on_batch=lambda done: progress(50, f"{done} chunks processed"),
             )
+        except Exception:
+            if not updating:
+                # batches committed before the failure are already searchable
+                self.db.rollback()
+                notify_embeddings_changed(self.db)
+            raise
+        finally:
+            # stops the extraction thread if embedding failed midway
+            chunks.close()
+
+        if not result["chunks_created"]:
+            logging.warning("Uploaded file %s: no text extracted.", file_id)
 
-            self.db.add(db_embedding)
+        progress(90, "saving file")
+        old_path = None
+        if updating:
+            # the re-upload becomes the stored content of the existing file row
+            old_path = target.file_path
+            new_version = {
+                "stored_filename": db_file.stored_filename,
+                "file_path": db_file.file_path,
+                "content_type": db_file.content_type,
+                "content_hash": db_file.content_hash,
+            }
+            # stored_filename is unique: drop the placeholder row first
+            self.db.delete(db_file)
+            self.db.flush()
 
+            for column, value in new_version.items():
+                setattr(target, column, value)
+            target.uploaded_at = func.now()
+
+        # the full text only for documents small enough to keep around
+        if text_length <= settings.UPLOADED_FILE_TEXT_MAX_CHARS:
+            target.text_content = "\n".join(kept_text)
+        else:
+            target.text_content = None
+        target.ingested_at = func.now()
         self.db.commit()
 
+        if old_path and old_path != target.file_path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+        removed_ids = result.pop("removed_ids")
+        notify_embeddings_changed(self.db, removed_ids=removed_ids)
+
+        return {
+            "file_id": target_id,
+            "updated": updating,
+            **result,
+            "total_text_length": text_length,
+        }
+
+    def upload_file(self, file: UploadFile):
+        # synchronous save + ingest (scripts); the API enqueues instead
+        db_file, duplicate = self.save_upload(file)
+        if not duplicate:
+            self.ingest_file(db_file.id)
+            self.db.refresh(db_file)
         return db_file
@@ -0,0 +1,121 @@
+# app/services/chunk_sync.py
+
+import hashlib
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.file_embedding import FileEmbedding
+from app.services.embedding_service import EmbeddingService, shorten_embedding
+
+
+def chunk_content_hash(text_content: str) -> str:
+    return hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+
+def sync_chunks(
+    db: Session,
+    embedding_service: EmbeddingService,
+    source_filter: dict,
+    chunks: Iterable[str],
+    row_fields: dict,
+    batch_size: Optional[int] = None,
+    commit_batches: bool = False,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """
+    Make the file_embeddings rows matching source_filter (e.g. {"file_id": 3}
+    or {"url_id": ...}) hold exactly `chunks`: unchanged chunks keep their
+    row and embedding, only new / changed ones are embedded, removed ones
+    are deleted. row_fields is applied to inserted rows (source_type,
+    file_id / url_id, ...).
+
+    Chunks are compared as multisets of content hashes (a chunk repeated
+    twice in a document needs two rows) and consumed lazily, batch_size at a
+    time (default INGEST_EMBED_BATCH_CHUNKS): each batch is embedded and
+    inserted before the next one is pulled, so `chunks` can be a generator.
+
+    commit_batches=False: nothing is committed, the caller commits deletes and
+    inserts together. True (first ingestion of a source): every batch is
+    committed and searchable right away. Either way the caller then calls
+    notify_embeddings_changed(db, removed_ids=result["removed_ids"]).
+    """
+    batch_size = batch_size or settings.INGEST_EMBED_BATCH_CHUNKS
+
+    # content hash -> ids of existing rows still unmatched, oldest first
+    unmatched = defaultdict(deque)
+    existing = (
+        db.query(FileEmbedding.id, FileEmbedding.content_hash)
+        .filter_by(**source_filter)
+        .order_by(FileEmbedding.id)
+        .all()
+    )
+    for row_id, content_hash in existing:
+        unmatched[content_hash].append(row_id)
+
+    total = kept = embedded = inserted_rows = 0
+    chunks = iter(chunks)
+
+    while True:
+        batch = list(islice(chunks, batch_size))
+        if not batch:
+            break
+        total += len(batch)
+
+        to_insert = []
+        for chunk in batch:
+            content_hash = chunk_content_hash(chunk)
+            if unmatched.get(content_hash):
+                unmatched[content_hash].popleft()
+                kept += 1
+            else:
+                to_insert.append((chunk, content_hash))
+
+        if to_insert:
+            embedded += len(to_insert)
+            embeddings = embedding_service.create_embeddings([chunk for chunk, _ in to_insert])
+
+            for (chunk, content_hash), (embedding_vector, tokens_used) in zip(to_insert, embeddings):
+                if not embedding_vector:
+                    continue
+
+                db.add(
+                    FileEmbedding(
+                        embedding=embedding_vector,
+                        embedding_short=shorten_embedding(embedding_vector),
+                        text_content=chunk,
+                        content_hash=content_hash,
+                        embedding_tokens=tokens_used,
+                        **row_fields,
+                    )
+                )
+                inserted_rows += 1
+
+        # flushed rows are only weakly held by the session: memory stays at one batch
+        if commit_batches:
+            db.commit()
+        else:
+            db.flush()
+
+        if on_batch:
+            on_batch(total)
+
+    to_delete = [row_id for row_ids in unmatched.values() for row_id in row_ids]
+    if to_delete:
+        db.query(FileEmbedding).filter(FileEmbedding.id.in_(to_delete)).delete(
+            synchronize_session=False
+        )
+        if commit_batches:
+            db.commit()
+
+    return {
+        "chunks_created": total,
+        "chunks_unchanged": kept,
+        "chunks_embedded": embedded,
+        "rows_inserted": inserted_rows,
+        "rows_deleted": len(to_delete),
+        "removed_ids": to_delete,
+    }
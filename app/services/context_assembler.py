@@ -0,0 +1,103 @@
+# app/services/context_assembler.py
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import tiktoken
+
+from app.core.config import settings
+
+# chat format overhead per message (role + separators)
+_MESSAGE_OVERHEAD = 4
+
+
+@lru_cache(maxsize=8)
+def _encoder(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    return len(_encoder(model or settings.OPENAI_MODEL).encode(text or ""))
+
+
+class ContextAssembler:
+    """
+    Fits one chat prompt into QA_CONTEXT_TOKEN_BUDGET.
+
+    fixed   -> system prompt, rolling summary, current question (always sent)
+    kb      -> retrieved chunks in ranking order, up to QA_KB_TOKEN_BUDGET
+    history -> most recent turns verbatim with whatever budget is left;
+               older turns are only represented by the summary
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        budget: Optional[int] = None,
+        kb_budget: Optional[int] = None,
+    ):
+        self.model = model or settings.OPENAI_MODEL
+        self.budget = budget or settings.QA_CONTEXT_TOKEN_BUDGET
+        self.kb_budget = kb_budget or settings.QA_KB_TOKEN_BUDGET
+
+    def _cost(self, content: str) -> int:
+        return count_tokens(content, self.model) + _MESSAGE_OVERHEAD
+
+    def assemble(
+        self,
+        system_prompt: str,
+        question: str,
+        kb_chunks: List[dict],
+        history: List[Tuple[str, str]],
+        summary: Optional[str] = None,
+    ) -> Tuple[List[dict], int]:
+        """
+        history: [(role, content), ...] oldest first, without the current
+        question. Returns (messages, number of history turns left out).
+        """
+        summary_message = (
+            "Summary of the earlier conversation:\n" + summary if summary else None
+        )
+
+        used = self._cost(system_prompt) + self._cost(question)
+        if summary_message:
+            used += self._cost(summary_message)
+
+        # KB chunks: best first, skip any that would not fit
+        kb_texts = []
+        kb_used = self._cost("Knowledge Base:\n")
+        kb_limit = min(self.kb_budget, self.budget - used)
+        for chunk in kb_chunks:
+            cost = count_tokens(chunk["text_content"], self.model) + 2
+            if kb_used + cost > kb_limit:
+                continue
+            kb_texts.append(chunk["text_content"])
+            kb_used += cost
+
+        if kb_texts:
+            used += kb_used
+
+        # history: newest first until the budget runs out, keeping it contiguous
+        kept = []
+        for role, content in reversed(history):
+            cost = self._cost(content)
+            if used + cost > self.budget:
+                break
+            kept.append({"role": role, "content": content})
+            used += cost
+        kept.reverse()
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if kb_texts:
+            messages.append(
+                {"role": "system", "content": "Knowledge Base:\n" + "\n\n".join(kb_texts)}
+            )
+        if summary_message:
+            messages.append({"role": "system", "content": summary_message})
+        messages.extend(kept)
+        messages.append({"role": "user", "content": question})
+
+        return messages, len(history) - len(kept)
@@ -0,0 +1,138 @@
+# app/services/conversation_summary_service.py
+
+import asyncio
+import logging
+from typing import Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.openai_client import get_async_openai_client
+from app.db.session import AsyncSessionLocal
+from app.models.chat import Chat
+from app.models.conversation_summary import ConversationSummary
+from app.services.context_assembler import count_tokens
+
+_SUMMARY_PROMPT = (
+    "You maintain a running summary of a customer support conversation. "
+    "Merge the new messages into the existing summary. Keep names, numbers, "
+    "decisions and open questions; drop greetings and filler. "
+    "Reply with the updated summary only."
+)
+
+
+class ConversationSummaryService:
+    """
+    Rolling per-session summary (conversation_summaries).
+
+    Turns up to last_chat_id are represented by the summary only; refresh()
+    folds everything except the newest QA_HISTORY_RECENT_MESSAGES into it.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, sess_id: int) -> Optional[ConversationSummary]:
+        result = await self.db.execute(
+            select(ConversationSummary).where(ConversationSummary.sess_id == sess_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def refresh(self, sess_id: int) -> bool:
+        current = await self.get(sess_id)
+        last_chat_id = current.last_chat_id if current else 0
+
+        chats = (
+            await self.db.execute(
+                select(Chat)
+                .where(Chat.sess_id == sess_id, Chat.id > last_chat_id)
+                .order_by(Chat.id.asc())
+            )
+        ).scalars().all()
+
+        fold = chats[: max(len(chats) - settings.QA_HISTORY_RECENT_MESSAGES, 0)]
+        if not fold:
+            return False
+
+        # bounded input per call; whatever is left is folded next time
+        lines, used = [], 0
+        for chat in fold:
+            line = f"{'User' if chat.sender == 'user' else 'Assistant'}: {chat.message}"
+            cost = count_tokens(line)
+            if lines and used + cost > settings.QA_SUMMARY_INPUT_TOKEN_BUDGET:
+                break
+            lines.append(line)
+            used += cost
+            last_chat_id = chat.id
+
+        response = await get_async_openai_client().chat.completions.create(
+            model=settings.QA_SUMMARY_MODEL,
+            max_tokens=settings.QA_SUMMARY_MAX_TOKENS,
+            messages=[
+                {"role": "system", "content": _SUMMARY_PROMPT},
+                {
+                    "role": "user",
+                    "content": "Current summary:\n"
+                    + (current.summary if current and current.summary else "(none)")
+                    + "\n\nNew messages:\n"
+                    + "\n".join(lines),
+                },
+            ],
+        )
+        summary = response.choices[0].message.content.strip()
+        usage = response.usage
+
+        stmt = insert(ConversationSummary).values(
+            sess_id=sess_id,
+            summary=summary,
+            last_chat_id=last_chat_id,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+        )
+        # a concurrent refresh that got further wins
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["sess_id"],
+                set_={
+                    "summary": stmt.excluded.summary,
+                    "last_chat_id": stmt.excluded.last_chat_id,
+                    "prompt_tokens": ConversationSummary.prompt_tokens + stmt.excluded.prompt_tokens,
+                    "completion_tokens": ConversationSummary.completion_tokens
+                    + stmt.excluded.completion_tokens,
+                },
+                where=ConversationSummary.last_chat_id < stmt.excluded.last_chat_id,
+            )
+        )
+        await self.db.commit()
+        return True
+
+
+# sessions with a refresh in flight (per process) + strong refs to the tasks
+_refreshing: Set[int] = set()
+_tasks: Set[asyncio.Task] = set()
+
+
+async def _refresh_in_background(sess_id: int):
+    try:
+        async with AsyncSessionLocal() as db:
+            await ConversationSummaryService(db).refresh(sess_id)
+    except Exception:
+        logging.exception("Conversation summary refresh failed for session %s", sess_id)
+    finally:
+        _refreshing.discard(sess_id)
+
+
+def schedule_summary_refresh(sess_id: int):
+    """
+    Fire-and-forget summary update off the request path; the next turn
+    picks up the new summary.
+    """
+    if sess_id in _refreshing:
+        return
+
+    _refreshing.add(sess_id)
+    task = asyncio.create_task(_refresh_in_background(sess_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
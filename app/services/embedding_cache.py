@@ -0,0 +1,139 @@
+# app/services/embedding_cache.py
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.models.embedding_cache import CachedEmbedding
+from app.utils.lru_cache import LRUCache
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text_value: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text_value)).strip()
+
+
+def normalize_question(question: str) -> str:
+    # "How do I reset my password?" == "how do i reset my password"
+    return normalize_text(question).lower().rstrip("?!. ")
+
+
+def embedding_cache_key(text_value: str, model: str, dimensions: Optional[int] = None) -> str:
+    raw = f"{model}\x00{dimensions or 0}\x00{normalize_text(text_value)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    memory   -> per-process LRU (float32 arrays, ~6 KB per 1536-dim entry)
+    postgres -> embedding_cache table shared by all workers, trimmed to
+                EMBEDDING_CACHE_MAX_ROWS by last_used_at
+
+    Writes go through the caller's session and are committed with it.
+    """
+
+    def __init__(self, memory: LRUCache):
+        self.memory = memory
+        self._writes_since_evict = 0
+
+    def get_many(self, db: Session, keys: Iterable[str]) -> Dict[str, Tuple[list, int]]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Tuple[list, int]] = {}
+
+        for key in keys:
+            cached = self.memory.get(key)
+            if cached is not None:
+                found[key] = (cached[0].tolist(), cached[1])
+
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+
+        rows = (
+            db.query(CachedEmbedding.key, CachedEmbedding.embedding, CachedEmbedding.tokens)
+            .filter(CachedEmbedding.key.in_(missing))
+            .all()
+        )
+
+        for key, embedding, tokens in rows:
+            vector = np.asarray(embedding, dtype=np.float32)
+            self.memory.set(key, (vector, tokens or 0))
+            found[key] = (vector.tolist(), tokens or 0)
+
+        if rows:
+            # LRU bookkeeping for the shared tier, one statement per lookup
+            db.execute(
+                text("UPDATE embedding_cache SET last_used_at = now() WHERE key IN :keys")
+                .bindparams(bindparam("keys", expanding=True)),
+                {"keys": [row[0] for row in rows]},
+            )
+
+        return found
+
+    def put_many(
+        self,
+        db: Session,
+        entries: List[Tuple[str, list, int]],
+        model: str,
+        dimensions: Optional[int] = None,
+    ):
+        """
+        entries: [(key, embedding, tokens), ...]
+        """
+        if not entries:
+            return
+
+        for key, embedding, tokens in entries:
+            self.memory.set(key, (np.asarray(embedding, dtype=np.float32), tokens))
+
+        stmt = insert(CachedEmbedding).values(
+            [
+                {
+                    "key": key,
+                    "model": model,
+                    "dimensions": dimensions or 0,
+                    "embedding": embedding,
+                    "tokens": tokens,
+                }
+                for key, embedding, tokens in entries
+            ]
+        )
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["key"]))
+
+        self._writes_since_evict += len(entries)
+        if self._writes_since_evict >= settings.EMBEDDING_CACHE_EVICT_EVERY:
+            self._writes_since_evict = 0
+            self.evict(db)
+
+    def evict(self, db: Session):
+        # size-based: keep the EMBEDDING_CACHE_MAX_ROWS most recently used
+        db.execute(
+            text("""
+                DELETE FROM embedding_cache
+                WHERE key IN (
+                    SELECT key FROM embedding_cache
+                    ORDER BY last_used_at DESC
+                    OFFSET :max_rows
+                )
+            """),
+            {"max_rows": settings.EMBEDDING_CACHE_MAX_ROWS},
+        )
+
+
+embedding_cache = EmbeddingCache(LRUCache(settings.EMBEDDING_CACHE_MEMORY_ENTRIES))
+
+# QA hot path: normalised question -> float32 query embedding
+query_embedding_cache = LRUCache(
+    settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+)
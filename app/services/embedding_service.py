@@ -1,18 +1,263 @@
-from openai import OpenAI
-import os
+import logging
+from typing import List, Optional, Tuple
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import numpy as np
+import tiktoken
+from openai import BadRequestError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.openai_client import get_async_openai_client, get_openai_client
+from app.services.embedding_cache import (
+    embedding_cache,
+    embedding_cache_key,
+    normalize_question,
+    query_embedding_cache,
+)
+
+
+def shorten_embedding(vector, dimensions: Optional[int] = None) -> list[float]:
+    """
+    Matryoshka shortening: keep the leading dimensions and re-normalise.
+    Same result as asking text-embedding-3-* for `dimensions=N`.
+    """
+    dimensions = dimensions or settings.EMBEDDING_SHORT_DIMENSIONS
+
+    short = np.asarray(vector[:dimensions], dtype=np.float32)
+    norm = np.linalg.norm(short)
+    if norm:
+        short = short / norm
+
+    return short.tolist()
 
 
 class EmbeddingService:
-    def create_embedding(self, text: str) -> list[float]:
+    def __init__(self, db: Optional[Session] = None):
+        # with a session, ingestion goes through the content-addressed cache
+        self.db = db
+
+    def _cache_enabled(self) -> bool:
+        return self.db is not None and settings.EMBEDDING_CACHE_ENABLED
+
+    def create_embedding(self, text: str, dimensions: Optional[int] = None) -> Tuple[List[float], int]:
         if not text.strip():
-            return []
+            return [], 0
 
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
+        if self._cache_enabled():
+            return self.create_embeddings([text], dimensions)[0]
+
+        params = {"dimensions": dimensions} if dimensions else {}
+        response = get_openai_client().embeddings.create(
+            model=settings.EMBEDDING_MODEL,
+            input=text,
+            **params,
         )
         tokens = response.usage.total_tokens
         
         return response.data[0].embedding,tokens
+
+    # =========================================================
+    # QUERY EMBEDDING (QA hot path)
+    # =========================================================
+    def create_query_embedding(self, question: str) -> Tuple[list, int]:
+        """
+        Embedding for a user question, served from the in-process TTL cache
+        keyed on the normalised question. With QUERY_EMBEDDING_CACHE_SHARED
+        the embedding_cache table is used as a second tier shared by all
+        workers (needs a session).
+        """
+        if not question.strip():
+            return [], 0
+
+        normalized = normalize_question(question)
+
+        cached = query_embedding_cache.get(normalized)
+        if cached is not None:
+            return cached.tolist(), 0
+
+        shared = self.db is not None and settings.QUERY_EMBEDDING_CACHE_SHARED
+        shared_key = embedding_cache_key(normalized, settings.EMBEDDING_MODEL)
+
+        if shared:
+            found = embedding_cache.get_many(self.db, [shared_key])
+            if shared_key in found:
+                embedding = found[shared_key][0]
+                query_embedding_cache.set(normalized, np.asarray(embedding, dtype=np.float32))
+                return embedding, 0
+
+        response = get_openai_client().embeddings.create(
+            model=settings.EMBEDDING_MODEL,
+            input=question,
+        )
+        embedding = response.data[0].embedding
+        tokens = response.usage.total_tokens
+
+        query_embedding_cache.set(normalized, np.asarray(embedding, dtype=np.float32))
+        if shared:
+            embedding_cache.put_many(
+                self.db, [(shared_key, embedding, tokens)], model=settings.EMBEDDING_MODEL
+            )
+
+        return embedding, tokens
+
+    async def acreate_query_embedding(
+        self, question: str, db: Optional[AsyncSession] = None
+    ) -> Tuple[list, int]:
+        """
+        Async variant of create_query_embedding (AsyncOpenAI). The shared
+        tier, if enabled, goes through the given AsyncSession.
+        """
+        if not question.strip():
+            return [], 0
+
+        normalized = normalize_question(question)
+
+        cached = query_embedding_cache.get(normalized)
+        if cached is not None:
+            return cached.tolist(), 0
+
+        shared = db is not None and settings.QUERY_EMBEDDING_CACHE_SHARED
+        shared_key = embedding_cache_key(normalized, settings.EMBEDDING_MODEL)
+
+        if shared:
+            found = await db.run_sync(lambda session: embedding_cache.get_many(session, [shared_key]))
+            if shared_key in found:
+                embedding = found[shared_key][0]
+                query_embedding_cache.set(normalized, np.asarray(embedding, dtype=np.float32))
+                return embedding, 0
+
+        response = await get_async_openai_client().embeddings.create(
+            model=settings.EMBEDDING_MODEL,
+            input=question,
+        )
+        embedding = response.data[0].embedding
+        tokens = response.usage.total_tokens
+
+        query_embedding_cache.set(normalized, np.asarray(embedding, dtype=np.float32))
+        if shared:
+            await db.run_sync(
+                lambda session: embedding_cache.put_many(
+                    session, [(shared_key, embedding, tokens)], model=settings.EMBEDDING_MODEL
+                )
+            )
+
+        return embedding, tokens
+
+    # =========================================================
+    # BATCH EMBEDDINGS
+    # =========================================================
+    def create_embeddings(
+        self,
+        texts: List[str],
+        dimensions: Optional[int] = None,
+    ) -> List[Tuple[list, int]]:
+        """
+        Embed many texts with as few requests as possible.
+
+        Returns one (embedding, tokens) pair per input, in input order;
+        blank inputs get ([], 0) like create_embedding(). Cache hits report
+        0 tokens since nothing was billed for them.
+        """
+        results: List[Tuple[list, int]] = [([], 0)] * len(texts)
+        indexes = [idx for idx, text in enumerate(texts) if text.strip()]
+
+        if not self._cache_enabled():
+            for idx, result in zip(indexes, self._embed_texts([texts[idx] for idx in indexes], dimensions)):
+                results[idx] = result
+            return results
+
+        model = settings.EMBEDDING_MODEL
+        keys = {idx: embedding_cache_key(texts[idx], model, dimensions) for idx in indexes}
+        cached = embedding_cache.get_many(self.db, keys.values())
+
+        # identical texts inside one call are embedded once
+        to_embed: dict = {}
+        for idx in indexes:
+            key = keys[idx]
+            if key in cached:
+                results[idx] = (cached[key][0], 0)
+            else:
+                to_embed.setdefault(key, idx)
+
+        if not to_embed:
+            return results
+
+        embedded = dict(
+            zip(to_embed, self._embed_texts([texts[idx] for idx in to_embed.values()], dimensions))
+        )
+
+        for idx in indexes:
+            key = keys[idx]
+            if key in embedded:
+                embedding, tokens = embedded[key]
+                results[idx] = (embedding, tokens if to_embed[key] == idx else 0)
+
+        embedding_cache.put_many(
+            self.db,
+            [(key, embedding, tokens) for key, (embedding, tokens) in embedded.items()],
+            model=model,
+            dimensions=dimensions,
+        )
+
+        return results
+
+    def _embed_texts(self, texts: List[str], dimensions: Optional[int] = None) -> List[Tuple[list, int]]:
+        results: List[Tuple[list, int]] = [([], 0)] * len(texts)
+
+        encoder = tiktoken.encoding_for_model(settings.EMBEDDING_MODEL)
+        pending = [(idx, text, len(encoder.encode(text))) for idx, text in enumerate(texts)]
+
+        for batch in self._pack_batches(pending):
+            for idx, embedding, tokens in self._embed_batch(batch, dimensions):
+                results[idx] = (embedding, tokens)
+
+        return results
+
+    def _pack_batches(self, items):
+        # respect both the per-request input count and token budget
+        batch, batch_tokens = [], 0
+
+        for item in items:
+            tokens = item[2]
+            if batch and (
+                len(batch) >= settings.EMBEDDING_BATCH_MAX_INPUTS
+                or batch_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                yield batch
+                batch, batch_tokens = [], 0
+
+            batch.append(item)
+            batch_tokens += tokens
+
+        if batch:
+            yield batch
+
+    def _embed_batch(self, batch, dimensions: Optional[int] = None):
+        params = {"dimensions": dimensions} if dimensions else {}
+
+        try:
+            response = get_openai_client().embeddings.create(
+                model=settings.EMBEDDING_MODEL,
+                input=[text for _, text, _ in batch],
+                **params,
+            )
+        except BadRequestError:
+            # our token estimate was off — halve the batch and retry
+            if len(batch) == 1:
+                raise
+            middle = len(batch) // 2
+            logging.warning("Embedding batch of %s rejected, splitting.", len(batch))
+            return self._embed_batch(batch[:middle], dimensions) + self._embed_batch(batch[middle:], dimensions)
+
+        # usage is only reported per request; attribute it per input using
+        # the local token counts and put any rounding difference on the last one
+        counted = [tokens for _, _, tokens in batch]
+        counted[-1] += response.usage.total_tokens - sum(counted)
+
+        embeddings = sorted(response.data, key=lambda item: item.index)
+
+        return [
+            (idx, item.embedding, tokens)
+            for (idx, _, _), item, tokens in zip(batch, embeddings, counted)
+        ]
@@ -1,40 +1,82 @@
 import os
+from typing import Iterator, List
+
 from pypdf import PdfReader
 from docx import Document
 
+from app.core.config import settings
+from app.core.cpu_pool import cpu_pool
+
+DOCX_CONTENT_TYPES = [
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+]
+
+
+# =========================================================
+# WORKER-PROCESS FUNCTIONS (run through cpu_pool)
+# =========================================================
+def pdf_page_count(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+
+def extract_pdf_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    # each worker opens the file itself; only page texts travel back
+    reader = PdfReader(file_path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
 
-def extract_text_from_file(file_path: str, content_type: str) -> str:
-    text_parts: list[str] = []
+def extract_docx_paragraphs(file_path: str) -> List[str]:
+    doc = Document(file_path)
+    return [para.text for para in doc.paragraphs if para.text.strip()]
 
+
+# =========================================================
+# EXTRACTION
+# =========================================================
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    Page texts in page order. Ranges of CPU_POOL_PDF_PAGES_PER_TASK pages
+    are extracted in parallel across the pool's processes.
+    """
+    page_count = cpu_pool.run(pdf_page_count, file_path)
+    step = max(settings.CPU_POOL_PDF_PAGES_PER_TASK, 1)
+    ranges = ((file_path, start, min(start + step, page_count)) for start in range(0, page_count, step))
+
+    for pages in cpu_pool.map(extract_pdf_page_range, ranges):
+        yield from pages
+
+
+def _iter_text_blocks(file_path: str, block_chars: int) -> Iterator[str]:
+    # whole lines, about block_chars at a time
+    block, size = [], 0
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            block.append(line)
+            size += len(line)
+            if size >= block_chars:
+                yield "".join(block)
+                block, size = [], 0
+    if block:
+        yield "".join(block)
+
+
+def iter_text_from_file(file_path: str, content_type: str, block_chars: int = 64 * 1024) -> Iterator[str]:
+    """
+    The text of an upload piece by piece (PDF pages, DOCX paragraphs,
+    ~block_chars of TXT lines) in document order, so the whole document is
+    never held as one string. Nothing is yielded for other types.
+    """
     # TXT
     if content_type == "text/plain" or file_path.lower().endswith(".txt"):
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+        yield from _iter_text_blocks(file_path, block_chars)
+        return
 
     # PDF
     if content_type == "application/pdf" or file_path.lower().endswith(".pdf"):
-        reader = PdfReader(file_path)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-        return "\n".join(text_parts)
-
-    # DOCX
-    if (
-        content_type
-        in [
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/msword",
-        ]
-        or file_path.lower().endswith(".docx")
-    ):
-        doc = Document(file_path)
-        for para in doc.paragraphs:
-            if para.text.strip():
-                text_parts.append(para.text)
-
-        return "\n".join(text_parts)
-
-    # fallback
-    return ""
+        yield from (page for page in iter_pdf_pages(file_path) if page)
+        return
+
+    # DOCX (python-docx loads the whole file anyway; paragraphs come back at once)
+    if content_type in DOCX_CONTENT_TYPES or file_path.lower().endswith(".docx"):
+        yield from cpu_pool.run(extract_docx_paragraphs, file_path)
@@ -0,0 +1,60 @@
+# app/services/ingestion_pipeline.py
+
+from typing import Iterable, Iterator
+
+import tiktoken
+
+from app.core.config import settings
+from app.core.cpu_pool import cpu_pool
+from app.services.text_processing import encode_text
+
+
+def _segments(blocks: Iterable[str], segment_chars: int) -> Iterator[str]:
+    # group small blocks (paragraphs) so each CPU pool task is worth the IPC
+    parts, size = [], 0
+    for block in blocks:
+        parts.append(block)
+        size += len(block) + 1
+        if size >= segment_chars:
+            yield "\n".join(parts) + "\n"
+            parts, size = [], 0
+    if parts:
+        yield "\n".join(parts)
+
+
+def iter_chunks(
+    blocks: Iterable[str],
+    max_tokens: int = 800,
+    overlap: int = 100,
+    model: str = "text-embedding-3-small",
+) -> Iterator[str]:
+    """
+    Streaming counterpart of text_processing.chunk_text: same max_tokens
+    windows advancing by max_tokens - overlap, but fed block by block
+    (pages / paragraphs). The overlap is carried across block boundaries
+    and only one window plus one segment of tokens is held at a time.
+    Segments are tokenized in the CPU pool, in order.
+    """
+    encoder = tiktoken.encoding_for_model(model)
+    step = max_tokens - overlap
+
+    window = []
+    fresh = 0  # tokens at the end of window not yet part of an emitted chunk
+
+    segments = _segments(blocks, settings.INGEST_SEGMENT_CHARS)
+    for tokens in cpu_pool.map(encode_text, ((segment, model) for segment in segments)):
+        window.extend(tokens)
+        fresh += len(tokens)
+
+        while len(window) >= max_tokens:
+            chunk = encoder.decode(window[:max_tokens])
+            if chunk.strip():
+                yield chunk
+            window = window[step:]
+            fresh = len(window) - overlap
+
+    # tail that is not already covered by the last full window
+    if fresh > 0:
+        chunk = encoder.decode(window)
+        if chunk.strip():
+            yield chunk
@@ -0,0 +1,343 @@
+# app/services/ingestion_queue.py
+
+import os
+import time
+import socket
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.ingestion_job import IngestionJob
+from app.services.build_service import BuildService
+from app.services.website_kb_service import WebsiteKBService
+
+
+JOB_KINDS = ("file", "url")
+
+# progress(percent, message) — handed to the ingestion services
+ProgressCallback = Callable[[int, str], None]
+
+
+def job_to_dict(job: IngestionJob) -> dict:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "progress_message": job.progress_message,
+        "payload": job.payload,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class IngestionQueue:
+    """
+    Durable ingestion queue on the ingestion_jobs table.
+
+    Any number of worker threads / processes claim jobs with
+    FOR UPDATE SKIP LOCKED, so a job runs once even with several workers.
+    A running job heartbeats through its progress updates; one that stops
+    (worker killed, deploy) is re-queued after INGESTION_JOB_STALE_SECONDS,
+    up to INGESTION_JOB_MAX_ATTEMPTS.
+
+    The claiming worker holds the job as a lease: progress / complete / fail
+    only touch the job while it is still running under that worker_id, so a
+    worker whose job was re-queued and claimed again cannot overwrite the
+    new attempt. They return False when the lease was lost.
+    """
+
+    def enqueue(self, db: Session, kind: str, payload: dict, user_id: Optional[int] = None) -> IngestionJob:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown ingestion job kind: {kind}")
+
+        job = IngestionJob(kind=kind, payload=payload, status="queued", user_id=user_id)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def get(self, db: Session, job_id: int) -> Optional[IngestionJob]:
+        return db.get(IngestionJob, job_id)
+
+    def list_jobs(self, db: Session, status: Optional[str] = None, page: int = 1, page_size: int = 20) -> dict:
+        query = db.query(IngestionJob)
+        if status:
+            query = query.filter(IngestionJob.status == status)
+
+        total = query.count()
+        jobs = (
+            query.order_by(IngestionJob.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+            .all()
+        )
+
+        return {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "items": [job_to_dict(job) for job in jobs],
+        }
+
+    # ===============================
+    # WORKER SIDE
+    # ===============================
+
+    def claim(self, db: Session, worker_id: str) -> Optional[tuple]:
+        """
+        Take the oldest queued job. Returns (id, kind, payload, attempts) or None.
+        """
+        row = db.execute(
+            text("""
+                UPDATE ingestion_jobs
+                SET status = 'running',
+                    attempts = attempts + 1,
+                    worker_id = :worker_id,
+                    progress = 0,
+                    progress_message = NULL,
+                    error = NULL,
+                    started_at = now(),
+                    updated_at = now()
+                WHERE id = (
+                    SELECT id FROM ingestion_jobs
+                    WHERE status = 'queued'
+                    ORDER BY created_at, id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, kind, payload, attempts
+            """),
+            {"worker_id": worker_id},
+        ).first()
+        db.commit()
+        return tuple(row) if row else None
+
+    def progress(self, db: Session, job_id: int, worker_id: str, percent: int, message: str) -> bool:
+        result = db.execute(
+            text("""
+                UPDATE ingestion_jobs
+                SET progress = :progress, progress_message = :message, updated_at = now()
+                WHERE id = :job_id AND worker_id = :worker_id AND status = 'running'
+            """),
+            {
+                "job_id": job_id,
+                "worker_id": worker_id,
+                "progress": max(0, min(int(percent), 100)),
+                "message": message[:255],
+            },
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    def complete(self, db: Session, job_id: int, worker_id: str, result: dict) -> bool:
+        updated = db.execute(
+            text("""
+                UPDATE ingestion_jobs
+                SET status = 'done', progress = 100, progress_message = 'done',
+                    result = :result, finished_at = now(), updated_at = now()
+                WHERE id = :job_id AND worker_id = :worker_id AND status = 'running'
+            """).bindparams(bindparam("result", type_=JSONB)),
+            {"job_id": job_id, "worker_id": worker_id, "result": result},
+        )
+        db.commit()
+        return updated.rowcount > 0
+
+    def fail(self, db: Session, job_id: int, worker_id: str, error: str, retry: bool) -> bool:
+        # retry=True puts the job back in the queue (attempts already counted)
+        result = db.execute(
+            text("""
+                UPDATE ingestion_jobs
+                SET status = CASE WHEN :retry AND attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+                    error = :error,
+                    worker_id = NULL,
+                    finished_at = CASE WHEN :retry AND attempts < :max_attempts THEN NULL ELSE now() END,
+                    updated_at = now()
+                WHERE id = :job_id AND worker_id = :worker_id AND status = 'running'
+            """),
+            {
+                "job_id": job_id,
+                "worker_id": worker_id,
+                "error": error,
+                "retry": retry,
+                "max_attempts": settings.INGESTION_JOB_MAX_ATTEMPTS,
+            },
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    def requeue_stale(self, db: Session) -> int:
+        result = db.execute(
+            text("""
+                UPDATE ingestion_jobs
+                SET status = CASE WHEN attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+                    error = 'worker stopped responding',
+                    worker_id = NULL,
+                    finished_at = CASE WHEN attempts < :max_attempts THEN NULL ELSE now() END,
+                    updated_at = now()
+                WHERE status = 'running'
+                  AND updated_at < now() - make_interval(secs => :stale_seconds)
+            """),
+            {
+                "max_attempts": settings.INGESTION_JOB_MAX_ATTEMPTS,
+                "stale_seconds": settings.INGESTION_JOB_STALE_SECONDS,
+            },
+        )
+        db.commit()
+        return result.rowcount
+
+
+ingestion_queue = IngestionQueue()
+
+
+# =========================================================
+# JOB EXECUTION
+# =========================================================
+
+def run_ingestion_job(db: Session, kind: str, payload: dict, progress: ProgressCallback) -> dict:
+    if kind == "file":
+        return BuildService(db).ingest_file(
+            payload["file_id"],
+            replaces_file_id=payload.get("replaces_file_id"),
+            progress=progress,
+        )
+
+    if kind == "url":
+        return WebsiteKBService(db).add_website(
+            payload["url"],
+            max_pages=payload.get("max_pages", 50),
+            max_depth=payload.get("max_depth", 3),
+            progress=progress,
+            update=payload.get("update", False),
+            tenant_id=payload.get("tenant_id"),
+        )
+
+    raise ValueError(f"Unknown ingestion job kind: {kind}")
+
+
+class IngestionWorker:
+    """
+    Pool of INGESTION_WORKER_CONCURRENCY threads draining the queue.
+
+    Runs inside the API process (INGESTION_WORKER_IN_PROCESS) or on its own
+    via `python -m app.worker`. Either way the threads are not the API
+    threadpool, so at most `concurrency` ingestions run at once and chat
+    requests never wait behind an upload.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, poll_seconds: Optional[float] = None):
+        self.concurrency = concurrency or settings.INGESTION_WORKER_CONCURRENCY
+        self.poll_seconds = poll_seconds or settings.INGESTION_POLL_SECONDS
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list = []
+
+        # stale jobs are looked for once per INGESTION_JOB_STALE_SECONDS per
+        # process, not on every poll of every thread
+        self._requeue_lock = threading.Lock()
+        self._last_requeue = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+
+        self._stop.clear()
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._loop,
+                args=(f"{self.name}:{index}",),
+                name=f"ingestion-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logging.info("Ingestion worker started (%s threads).", self.concurrency)
+
+    def stop(self, timeout: Optional[float] = None):
+        # running jobs finish first; queued ones wait for the next worker
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        # a job was just enqueued in this process: skip the poll delay
+        self._wake.set()
+
+    def _loop(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                ran = self._run_next(worker_id)
+            except Exception:
+                logging.exception("Ingestion worker %s: queue error", worker_id)
+                ran = False
+
+            if not ran:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _maybe_requeue_stale(self, db: Session):
+        with self._requeue_lock:
+            now = time.monotonic()
+            if self._last_requeue and now - self._last_requeue < settings.INGESTION_JOB_STALE_SECONDS:
+                return
+            self._last_requeue = now
+
+        requeued = ingestion_queue.requeue_stale(db)
+        if requeued:
+            logging.warning("Re-queued %s stale ingestion job(s).", requeued)
+
+    def _run_next(self, worker_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            self._maybe_requeue_stale(db)
+            claimed = ingestion_queue.claim(db, worker_id)
+            if claimed is None:
+                return False
+
+            job_id, kind, payload, attempts = claimed
+            logging.info("Ingestion job %s (%s) started, attempt %s.", job_id, kind, attempts)
+
+            def progress(percent: int, message: str):
+                # own session: the job's session may be mid-transaction
+                progress_db = SessionLocal()
+                try:
+                    ingestion_queue.progress(progress_db, job_id, worker_id, percent, message)
+                finally:
+                    progress_db.close()
+
+            try:
+                result = run_ingestion_job(db, kind, payload, progress)
+            except Exception as e:
+                db.rollback()
+                logging.exception("Ingestion job %s failed.", job_id)
+                # bad input will not get better on a retry
+                if not ingestion_queue.fail(db, job_id, worker_id, str(e), retry=not isinstance(e, ValueError)):
+                    logging.warning("Ingestion job %s: lease lost, failure not recorded.", job_id)
+                return True
+
+            if not ingestion_queue.complete(db, job_id, worker_id, result):
+                logging.warning("Ingestion job %s: lease lost (re-queued as stale), result dropped.", job_id)
+                return True
+
+            logging.info("Ingestion job %s done.", job_id)
+            return True
+        finally:
+            db.close()
+
+
+ingestion_worker = IngestionWorker()
@@ -1,24 +1,37 @@
 #knowledge_base_service.py
 
-from typing import Optional
+from typing import Optional, Tuple
 import random
+import hashlib
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 
 from app.models.file_embedding import FileEmbedding
 from app.models.uploaded_file import UploadedFile
-from app.services.embedding_service import EmbeddingService
+from app.services.embedding_cache import normalize_question
+from app.services.embedding_service import EmbeddingService, shorten_embedding
+from app.services.vector_search import notify_embeddings_changed
+
+
+def qa_question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+def split_qa_text(text_content: str) -> Tuple[str, str]:
+    # inverse of the "Question: ...\nAnswer: ..." layout used by add_qa
+    question, _, answer = (text_content or "").partition("\nAnswer: ")
+    return question.removeprefix("Question: ").strip(), answer.strip()
 
 
 class KnowledgeBaseService:
     def __init__(self, db: Session):
         self.db = db
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = EmbeddingService(db)
 
     # =========================================================
     # ADD QA
     # =========================================================
-    def add_qa(self, question: str, answer: str) -> dict:
+    def add_qa(self, question: str, answer: str, tenant_id: Optional[int] = None) -> dict:
         question = question.strip()
         answer = answer.strip()
 
@@ -36,15 +49,19 @@ class KnowledgeBaseService:
 
         db_embedding = FileEmbedding(
             embedding=embedding_vector,
+            embedding_short=shorten_embedding(embedding_vector),
             text_content=combined_text,
             source_type="kb_qa",
             qa_id=generated_qa_id,
+            question_hash=qa_question_hash(question),
             embedding_tokens=tokens_used,
+            user_id=tenant_id,
         )
 
         self.db.add(db_embedding)
         self.db.commit()
         self.db.refresh(db_embedding)
+        notify_embeddings_changed(self.db)
 
         return {
             "id": db_embedding.id,
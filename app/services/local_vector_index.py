@@ -0,0 +1,363 @@
+# app/services/local_vector_index.py
+
+import os
+import time
+import logging
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+from pgvector.sqlalchemy import Vector
+
+from app.core.config import settings
+
+
+# rows converted to float32 at a time when the matrix is stored as float16
+_FLOAT16_BLOCK_ROWS = 65536
+
+# filterable columns kept next to the matrix (NULL stored as -1)
+_META_COLUMNS = ("source_type", "user_id", "file_id", "url_id", "qa_id")
+
+# search filter argument -> metadata column
+_FILTER_COLUMNS = {
+    "source_types": "source_type",
+    "file_ids": "file_id",
+    "url_ids": "url_id",
+    "qa_ids": "qa_id",
+}
+
+
+class LocalVectorIndex:
+    """
+    In-process brute-force vector index over file_embeddings.
+
+    matrix -> memory-mapped (capacity, dim) array of L2-normalised vectors
+    ids    -> file_embeddings.id of each matrix row (row offset == position),
+              -1 once the row was removed
+    meta   -> source_type (as small int code) / user_id / file_id / url_id /
+              qa_id per row, used for filtered search
+
+    NOTE:
+    Postgres stays the source of truth. Every worker process keeps its own
+    copy and catches up with refresh(): rows with id > last seen id, plus
+    rows within lookback_ids below it that were not loaded yet (ids are
+    taken at insert but become visible at commit, so a lower id can show up
+    after a higher one). Every reconcile_seconds all ids are compared with
+    Postgres instead, which also drops rows deleted by other processes.
+    """
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        dtype: str = "float32",
+        directory: Optional[str] = None,
+        lookback_ids: int = 10000,
+        reconcile_seconds: float = 3600,
+    ):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.directory = directory
+        self.lookback_ids = lookback_ids
+        self.reconcile_seconds = reconcile_seconds
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._path: Optional[str] = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._meta = {column: np.empty(0, dtype=np.int64) for column in _META_COLUMNS}
+        self._source_codes: dict = {}
+        self._count = 0
+        self._removed = 0
+        self._max_id = 0
+        self._last_refresh = 0.0
+        self._last_reconcile = 0.0
+
+    # ===============================
+    # STORAGE
+    # ===============================
+
+    def _ensure_capacity(self, needed: int):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(needed, capacity * 2, 1024)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="file_embeddings.", suffix=".mmap", dir=self.directory)
+        os.close(fd)
+
+        matrix = np.memmap(path, dtype=self.dtype, mode="w+", shape=(new_capacity, self.dim))
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        meta = {column: np.full(new_capacity, -1, dtype=np.int64) for column in _META_COLUMNS}
+
+        if self._count:
+            matrix[: self._count] = self._matrix[: self._count]
+            ids[: self._count] = self._ids[: self._count]
+            for column in _META_COLUMNS:
+                meta[column][: self._count] = self._meta[column][: self._count]
+
+        old_path = self._path
+        self._matrix, self._ids, self._meta, self._path = matrix, ids, meta, path
+
+        # in-flight searches keep their own reference to the old mapping
+        if old_path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _source_code(self, source_type: Optional[str]) -> int:
+        if source_type is None:
+            return -1
+        return self._source_codes.setdefault(source_type, len(self._source_codes))
+
+    def add(self, ids, vectors, meta: Optional[dict] = None):
+        """
+        meta: optional {column: sequence} for the filterable columns;
+        source_type values are strings, the rest ints or None.
+        """
+        if len(ids) == 0:
+            return
+
+        meta = meta or {}
+
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+
+        with self._lock:
+            start = self._count
+            end = start + len(ids)
+
+            self._ensure_capacity(end)
+            self._matrix[start:end] = vectors
+            self._ids[start:end] = ids
+
+            for column in _META_COLUMNS:
+                values = meta.get(column)
+                if values is None:
+                    self._meta[column][start:end] = -1
+                elif column == "source_type":
+                    self._meta[column][start:end] = [self._source_code(v) for v in values]
+                else:
+                    self._meta[column][start:end] = [-1 if v is None else v for v in values]
+
+            # publish rows only after they are fully written
+            self._count = end
+            self._max_id = max(self._max_id, int(np.max(ids)))
+
+    def remove(self, ids) -> int:
+        """
+        Drop rows by file_embeddings.id (deleted / replaced chunks). The rows
+        are masked out of searches; their slots are not reused.
+        Returns the number of rows removed.
+        """
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(ids) == 0:
+            return 0
+
+        with self._lock:
+            rows = np.flatnonzero(np.isin(self._ids[: self._count], ids))
+            self._ids[rows] = -1
+            self._removed += len(rows)
+
+        return len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+            self._removed = 0
+            self._max_id = 0
+        self._last_reconcile = 0.0
+
+    def __len__(self):
+        return self._count - self._removed
+
+    # ===============================
+    # SYNC WITH POSTGRES
+    # ===============================
+
+    def _missed_ids(self, db: Session, reconcile: bool) -> List[int]:
+        """
+        Ids at or below the highest loaded one that Postgres has and the
+        index does not: the whole table on a reconcile, otherwise the last
+        lookback_ids ids. A reconcile also drops rows Postgres no longer has.
+        """
+        max_id = self._max_id
+        floor = 0 if reconcile else max(max_id - self.lookback_ids, 0)
+
+        present = np.fromiter(
+            db.execute(
+                text("SELECT id FROM file_embeddings WHERE id > :floor AND id <= :max_id"),
+                {"floor": floor, "max_id": max_id},
+            ).scalars(),
+            dtype=np.int64,
+        )
+
+        with self._lock:
+            loaded = self._ids[: self._count]
+            loaded = loaded[loaded > floor]
+
+        if reconcile:
+            self.remove(np.setdiff1d(loaded, present, assume_unique=True))
+
+        return np.setdiff1d(present, loaded).tolist()
+
+    def refresh(self, db: Session, batch_size: int = 5000) -> int:
+        """
+        Load rows committed since the last refresh (incremental by id, with
+        the lookback / reconcile described on the class).
+        Returns the number of rows added.
+        """
+        sql = (
+            text("""
+                SELECT id, embedding, source_type, user_id, file_id, url_id, qa_id
+                FROM file_embeddings
+                WHERE id > :last_id OR id IN :missed_ids
+                ORDER BY id
+            """)
+            .bindparams(bindparam("missed_ids", expanding=True))
+            .columns(embedding=Vector(self.dim))
+            .execution_options(stream_results=True)
+        )
+
+        # another thread is already catching up — its rows are good enough
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0
+
+        added = 0
+        try:
+            missed_ids = []
+            if self._count:
+                reconcile = time.monotonic() - self._last_reconcile >= self.reconcile_seconds
+                missed_ids = self._missed_ids(db, reconcile)
+                if reconcile:
+                    self._last_reconcile = time.monotonic()
+                if missed_ids:
+                    logging.info("Local vector index: %s rows committed out of id order.", len(missed_ids))
+            else:
+                # full load: nothing to reconcile for a while
+                self._last_reconcile = time.monotonic()
+
+            result = db.execute(sql, {"last_id": self._max_id, "missed_ids": missed_ids})
+
+            for rows in result.partitions(batch_size):
+                ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+                vectors = np.stack([np.asarray(row[1], dtype=np.float32) for row in rows])
+                meta = {
+                    column: [row[position] for row in rows]
+                    for position, column in enumerate(_META_COLUMNS, start=2)
+                }
+                self.add(ids, vectors, meta)
+                added += len(rows)
+
+            self._last_refresh = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+        if added:
+            logging.info("Local vector index: loaded %s rows (total %s).", added, self._count)
+
+        return added
+
+    def maybe_refresh(self, db: Session, interval_seconds: float) -> int:
+        # rows written by other worker processes only arrive this way
+        if self._count and time.monotonic() - self._last_refresh < interval_seconds:
+            return 0
+        return self.refresh(db)
+
+    # ===============================
+    # SEARCH
+    # ===============================
+
+    def _scores(self, matrix, query: np.ndarray) -> np.ndarray:
+        if self.dtype == np.float32:
+            return matrix @ query
+
+        # numpy has no BLAS path for float16; upcast block by block
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], _FLOAT16_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + _FLOAT16_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    def _filter_mask(self, meta: dict, count: int, filters: dict) -> Optional[np.ndarray]:
+        mask = None
+
+        for key, column in _FILTER_COLUMNS.items():
+            values = filters.get(key)
+            if values is None:
+                continue
+
+            if column == "source_type":
+                values = [self._source_codes.get(v, -2) for v in values]
+
+            column_mask = np.isin(meta[column][:count], np.asarray(list(values), dtype=np.int64))
+            mask = column_mask if mask is None else mask & column_mask
+
+        if filters.get("user_id") is not None:
+            column_mask = meta["user_id"][:count] == int(filters["user_id"])
+            mask = column_mask if mask is None else mask & column_mask
+
+        return mask
+
+    def search(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        filters: Optional[dict] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns [(file_embedding_id, cosine_distance), ...] best first.
+        filters uses the same keys as vector_search (source_types, file_ids,
+        url_ids, qa_ids, user_id).
+        """
+        with self._lock:
+            count = self._count
+            removed = self._removed
+            matrix = self._matrix
+            ids = self._ids
+            meta = self._meta
+
+        if not count or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self._scores(matrix[:count], query)
+
+        mask = self._filter_mask(meta, count, filters) if filters else None
+        if removed:
+            alive = ids[:count] >= 0
+            mask = alive if mask is None else mask & alive
+        if mask is not None:
+            if not mask.any():
+                return []
+            scores = np.where(mask, scores, -np.inf)
+            count = int(mask.sum())
+
+        k = min(top_k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(int(ids[i]), float(1.0 - scores[i])) for i in top]
+
+
+local_vector_index = LocalVectorIndex(
+    dim=1536,
+    dtype=settings.LOCAL_VECTOR_INDEX_DTYPE,
+    directory=settings.LOCAL_VECTOR_INDEX_DIR,
+    lookback_ids=settings.LOCAL_VECTOR_INDEX_LOOKBACK_IDS,
+    reconcile_seconds=settings.LOCAL_VECTOR_INDEX_RECONCILE_SECONDS,
+)
+
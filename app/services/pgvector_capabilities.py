@@ -0,0 +1,75 @@
+# app/services/pgvector_capabilities.py
+
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+# hnsw.ef_search upper bound enforced by pgvector
+MAX_EF_SEARCH = 1000
+
+_CAPABILITIES_SQL = text("""
+    SELECT
+        (SELECT extversion FROM pg_extension WHERE extname = 'vector') AS extversion,
+        ARRAY(SELECT indexname FROM pg_indexes WHERE tablename = 'file_embeddings') AS indexes
+""")
+
+
+class PgvectorCapabilities:
+    """
+    What the database can do for vector search: installed pgvector version
+    and the file_embeddings index names. Read once per process, on the
+    first search (vector search, answer cache) that needs it.
+
+    NOTE:
+    Indexes built after the process started are only seen after a restart.
+    """
+
+    def __init__(self):
+        self.version: Optional[tuple] = None
+        self.indexes: frozenset = frozenset()
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def remember(self, extversion: Optional[str], indexes):
+        parts = []
+        for part in (extversion or "0").split("."):
+            digits = "".join(ch for ch in part if ch.isdigit())
+            parts.append(int(digits or 0))
+        self.indexes = frozenset(indexes or ())
+        self.version = tuple(parts)
+
+    def load(self, db: Session):
+        if not self.loaded:
+            row = db.execute(_CAPABILITIES_SQL).one()
+            self.remember(row.extversion, row.indexes)
+
+    async def aload(self, db: AsyncSession):
+        if not self.loaded:
+            row = (await db.execute(_CAPABILITIES_SQL)).one()
+            self.remember(row.extversion, row.indexes)
+
+    def has_index(self, name: str) -> bool:
+        # unknown (not loaded yet) counts as present
+        return not self.loaded or name in self.indexes
+
+    def iterative_scan_mode(self) -> Optional[str]:
+        """
+        VECTOR_ITERATIVE_SCAN if the installed pgvector supports it (>= 0.8),
+        else None: filtered scans then have to widen the candidate list.
+        """
+        mode = (settings.VECTOR_ITERATIVE_SCAN or "off").lower()
+        if mode not in ("relaxed_order", "strict_order", "off"):
+            raise ValueError(f"Unsupported VECTOR_ITERATIVE_SCAN: {mode}")
+        if mode == "off" or (self.version or (0,)) < (0, 8):
+            return None
+        return mode
+
+
+pgvector_capabilities = PgvectorCapabilities()
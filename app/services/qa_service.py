@@ -1,35 +1,95 @@
 # app/services/qa_service.py
 
-from sqlalchemy.orm import Session
-from openai import OpenAI
-import os
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
 
+import openai
+from sqlalchemy import select, func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.openai_client import get_async_openai_client, openai_timeout
 from app.models.chat import Chat
+from app.models.file_embedding import FileEmbedding
 from app.models.session import ConversationSession
+from app.db.session import AsyncSessionLocal
+from app.services.answer_cache import KB_VERSION_SQL, answer_cache, answer_cache_scope
+from app.services.context_assembler import ContextAssembler
+from app.services.embedding_cache import normalize_question
+from app.services.conversation_summary_service import (
+    ConversationSummaryService,
+    schedule_summary_refresh,
+)
 from app.services.embedding_service import EmbeddingService
-from app.services.vector_search import search_similar_chunks
+from app.services.knowledge_base_service import qa_question_hash, split_qa_text
+from app.services.vector_search import asearch_similar_chunks, select_relevant_chunks
 from app.services.websocket_manager import WebSocketManager
+from app.utils.latency_tracker import LatencyTracker
+from app.utils.single_flight import SingleFlight
+from app.utils.stage_timer import StageTimer
+
+
+# identical concurrent questions share embedding / retrieval / answer calls
+_inflight = SingleFlight()
+
+# recent chat completion latencies, drives the hedge delay
+_llm_latency = LatencyTracker(settings.QA_LATENCY_WINDOW)
+
+# what counts as "out of time" for the LLM stage
+_DEADLINE_ERRORS = (asyncio.TimeoutError, openai.APITimeoutError)
+
+# how a streaming turn ends when the client goes away (task cancelled /
+# generator closed)
+_INTERRUPTED = (asyncio.CancelledError, GeneratorExit)
+
+# background saves of interrupted turns (kept referenced until done)
+_tasks: set = set()
+
+EXTRACTIVE_PREFIX = (
+    "I couldn't put together a full answer in time. "
+    "Here is the most relevant information I found:\n\n"
+)
+NO_ANSWER_IN_TIME = "Sorry, I couldn't answer in time. Please try again in a moment."
+
+SYSTEM_PROMPT = (
+    "You are a knowledge-based assistant. Answer ONLY using the provided knowledge base "
+    "and conversation history. If the answer is not present, say: 'I don't know.'"
+)
 
 
 class QAService:
-    def __init__(self, db: Session):
+    """
+    Fully async /qa pipeline: AsyncOpenAI for embeddings and chat,
+    asyncpg (AsyncSession) for every DB round trip, so a slow LLM call
+    never blocks the event loop (websockets, other requests).
+    """
+
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.embedding_service = EmbeddingService()
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    # Check if human already handling
-    def _is_taken_over(self, sess_id: int) -> bool:
-        return (
-            self.db.query(ConversationSession)
-            .filter(
-                ConversationSession.sess_id == sess_id,
-                ConversationSession.status == "pending_agent",
+        self.client = get_async_openai_client()
+        self.context_assembler = ContextAssembler()
+
+    # Handoff status + KB version in one round trip
+    async def _session_state(self, sess_id: int):
+        row = (
+            await self.db.execute(
+                text(f"""
+                    SELECT
+                        (SELECT status FROM conversation_sessions WHERE sess_id = :sess_id) AS status,
+                        {KB_VERSION_SQL} AS kb_version
+                """),
+                {"sess_id": sess_id},
             )
-            .first()
-            is not None
-        )
+        ).one()
+        return row.status, row.kb_version
 
-    # Save chat message
+    # Add chat message to the turn's transaction (committed by the caller)
     def _save_message(
         self,
         sess_id: int,
@@ -39,6 +99,8 @@ class QAService:
         prompt_tokens: int = 0,
         completion_tokens: int = 0,
         total_tokens: int = 0,
+        answer_source: Optional[str] = None,
+        created_at: Optional[datetime] = None,
     ) -> Chat:
         chat = Chat(
             sess_id=sess_id,
@@ -48,12 +110,33 @@ class QAService:
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             total_tokens=total_tokens,
+            answer_source=answer_source,
         )
+        if created_at is not None:
+            chat.created_at = created_at
         self.db.add(chat)
-        self.db.commit()
-        self.db.refresh(chat)
         return chat
 
+    async def _commit_turn(self, turn: dict):
+        await self.db.commit()
+        turn["persisted"] = True
+
+    def _save_question(self, turn: dict) -> Chat:
+        # stamped with the time it was asked: it is written with the answer,
+        # in the same transaction, so now() would tie with the bot message
+        return self._save_message(
+            turn["sess_id"], "user", turn["question"], created_at=turn["asked_at"]
+        )
+
+    async def _reply_without_llm(self, turn: dict, reply: str, answer_source: str) -> dict:
+        # FAQ / answer cache: question + answer in one commit
+        self._save_question(turn)
+        self._save_message(turn["sess_id"], "bot", reply, answer_source=answer_source)
+        await self._commit_turn(turn)
+
+        turn["reply"] = reply
+        return turn
+
     # Detect failure response
     def _bot_does_not_know(self, answer: str) -> bool:
         if not answer:
@@ -61,142 +144,668 @@ class QAService:
         low = answer.lower().strip()
         return low in ["i don't know.", "i dont know", "i'm not sure.", "i don't know"]
 
-    # Count previous failures
-    def _get_failure_count(self, sess_id: int) -> int:
-        return (
-            self.db.query(Chat)
-            .filter(
-                Chat.sess_id == sess_id,
-                Chat.sender == "bot",
-                Chat.needs_human == True,
+    # Count this failure on the session row (created on the first one)
+    async def _record_failure(self, sess_id: int):
+        stmt = insert(ConversationSession).values(
+            sess_id=sess_id, status="bot_active", failure_count=1
+        )
+        row = (
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["sess_id"],
+                    set_={
+                        "failure_count": ConversationSession.failure_count + 1,
+                        "updated_at": func.now(),
+                    },
+                ).returning(
+                    ConversationSession.id,
+                    ConversationSession.failure_count,
+                    ConversationSession.status,
+                )
+            )
+        ).one()
+        return row.id, row.failure_count, row.status
+
+    # bot_active -> pending_agent; only the turn that flips it notifies agents
+    async def _request_handoff(self, session_id: int) -> bool:
+        result = await self.db.execute(
+            update(ConversationSession)
+            .where(
+                ConversationSession.id == session_id,
+                ConversationSession.status == "bot_active",
+            )
+            .values(status="pending_agent")
+            .returning(ConversationSession.id)
+        )
+        return result.first() is not None
+
+    # =========================================================
+    # FAQ FAST PATH (curated kb_qa pairs, no LLM call)
+    # =========================================================
+    def _faq_allowed(self, filters: Optional[dict]) -> bool:
+        # kb_qa rows have no file_id / url_id, so those filters exclude them
+        filters = filters or {}
+        if filters.get("file_ids") is not None or filters.get("url_ids") is not None:
+            return False
+        source_types = filters.get("source_types")
+        return source_types is None or "kb_qa" in source_types
+
+    async def _faq_by_hash(self, question: str, filters: Optional[dict]) -> Optional[str]:
+        filters = filters or {}
+        query = select(FileEmbedding.text_content).where(
+            FileEmbedding.question_hash == qa_question_hash(question),
+            FileEmbedding.source_type == "kb_qa",
+        )
+        if filters.get("qa_ids") is not None:
+            query = query.where(FileEmbedding.qa_id.in_(filters["qa_ids"]))
+        if filters.get("user_id") is not None:
+            query = query.where(FileEmbedding.user_id == filters["user_id"])
+
+        text_content = (
+            await self.db.execute(query.order_by(FileEmbedding.id.desc()).limit(1))
+        ).scalar_one_or_none()
+
+        if text_content is None:
+            return None
+        return split_qa_text(text_content)[1] or None
+
+    def _faq_by_similarity(self, chunks: list) -> Optional[str]:
+        # chunks come from the regular search, so filters are already applied
+        faqs = [chunk for chunk in chunks if chunk["source_type"] == "kb_qa"]
+        if not faqs:
+            return None
+
+        best = min(faqs, key=lambda chunk: chunk["distance"])
+        if 1.0 - best["distance"] < settings.FAQ_MIN_SIMILARITY:
+            return None
+        return split_qa_text(best["text_content"])[1] or None
+
+    # =========================================================
+    # SINGLE-FLIGHT STAGES
+    # shared calls run on their own session: the request that started one
+    # may go away while others still wait for it
+    # =========================================================
+    async def _embed(self, question: str):
+        async def embed():
+            async with AsyncSessionLocal() as db:
+                result = await self.embedding_service.acreate_query_embedding(question, db=db)
+                await db.commit()
+                return result
+
+        (query_embedding, tokens), shared = await _inflight.do(
+            ("embed", normalize_question(question)), embed
+        )
+        return query_embedding, 0 if shared else tokens
+
+    async def _retrieve(self, question: str, query_embedding, filters: Optional[dict], flight_key):
+        async def retrieve():
+            async with AsyncSessionLocal() as db:
+                return await asearch_similar_chunks(
+                    db=db,
+                    query_embedding=query_embedding,
+                    top_k=settings.QA_TOP_K,
+                    query_text=question,
+                    **(filters or {}),
+                )
+
+        found_chunks, _ = await _inflight.do(("retrieve",) + flight_key, retrieve)
+        return found_chunks
+
+    async def _hedged_completion(self, messages: list, timeout: float):
+        """
+        One chat completion. With QA_HEDGE_ENABLED, an identical second request
+        is sent when the first is still running after the recent
+        QA_HEDGE_PERCENTILE latency; the first one to succeed wins and the
+        other is cancelled.
+        """
+        async def call():
+            started = time.monotonic()
+            response = await self.client.chat.completions.create(
+                model=settings.OPENAI_MODEL, messages=messages, timeout=openai_timeout(timeout)
             )
-            .count()
+            _llm_latency.record(time.monotonic() - started)
+            return response.choices[0].message.content.strip(), response.usage
+
+        hedge_after = None
+        if settings.QA_HEDGE_ENABLED:
+            hedge_after = _llm_latency.percentile(
+                settings.QA_HEDGE_PERCENTILE, settings.QA_HEDGE_MIN_SAMPLES
+            )
+
+        if hedge_after is None or hedge_after >= timeout:
+            return await call()
+
+        pending = {asyncio.ensure_future(call())}
+        tasks = set(pending)
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                logging.info("QA: completion slower than %.2fs, sending hedged request", hedge_after)
+                hedge = asyncio.ensure_future(call())
+                tasks.add(hedge)
+                pending.add(hedge)
+
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _complete(self, turn: dict):
+        """
+        Non-streaming LLM call, bounded by what is left of the turn deadline.
+        History-free turns with the same question, KB version and filters
+        share one completion; only the caller that ran it reports token usage.
+        Raises asyncio.TimeoutError when the deadline runs out.
+        """
+        remaining = turn["deadline"] - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+
+        timeout = min(remaining, settings.QA_LLM_TIMEOUT_SECONDS)
+
+        async def complete():
+            return await asyncio.wait_for(
+                self._hedged_completion(turn["messages"], timeout), timeout
+            )
+
+        if not turn["cacheable"]:
+            return await complete()
+
+        # a waiter gives up at its own deadline, the shared call keeps going
+        (answer, usage), shared = await asyncio.wait_for(
+            _inflight.do(("answer",) + turn["flight_key"], complete), remaining
+        )
+        turn["answer_shared"] = shared
+        return answer, None if shared else usage
+
+    async def _stream_completion(self, turn: dict):
+        # yields chunks; every wait is bounded by what is left of the deadline
+        def remaining() -> float:
+            left = turn["deadline"] - time.monotonic()
+            if left <= 0:
+                raise asyncio.TimeoutError()
+            return left
+
+        stream = await asyncio.wait_for(
+            self.client.chat.completions.create(
+                model=settings.OPENAI_MODEL,
+                messages=turn["messages"],
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=openai_timeout(min(remaining(), settings.QA_LLM_TIMEOUT_SECONDS)),
+            ),
+            remaining(),
         )
 
-    async def ask(self, question: str, sess_id: int) -> str:
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining())
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            await stream.close()
+
+    def _extractive_answer(self, turn: dict) -> str:
+        # degraded reply when the LLM misses the deadline: best chunk verbatim
+        chunks = turn.get("kb_chunks") or []
+        if not chunks:
+            return NO_ANSWER_IN_TIME
+
+        best = chunks[0]
+        if best["source_type"] == "kb_qa":
+            excerpt = split_qa_text(best["text_content"])[1]
+        else:
+            excerpt = (best["text_content"] or "").strip()
+
+        if not excerpt:
+            return NO_ANSWER_IN_TIME
+
+        limit = settings.QA_EXTRACTIVE_MAX_CHARS
+        if len(excerpt) > limit:
+            excerpt = excerpt[:limit].rsplit(" ", 1)[0] + "…"
+        return EXTRACTIVE_PREFIX + excerpt
+
+    async def _until_deadline(self, turn: dict, awaitable):
+        # pre-LLM stages share the turn deadline; raises asyncio.TimeoutError
+        return await asyncio.wait_for(awaitable, max(turn["deadline"] - time.monotonic(), 0))
+
+    async def _load_history(self, sess_id: int):
+        """
+        (summary, chats not folded into it yet), on its own session so it can
+        run next to the main pipeline. Called before the current question is
+        saved, so the question never shows up in its own history.
+        """
+        async with AsyncSessionLocal() as db:
+            summary = await ConversationSummaryService(db).get(sess_id)
+
+            previous_chats = (
+                await db.execute(
+                    select(Chat)
+                    .where(
+                        Chat.sess_id == sess_id,
+                        Chat.id > (summary.last_chat_id if summary else 0),
+                    )
+                    .order_by(Chat.id.desc())
+                    .limit(settings.QA_HISTORY_MAX_MESSAGES)
+                )
+            ).scalars().all()
+
+        return summary, list(reversed(previous_chats))
+
+    def _new_turn(self, question: str, sess_id: int, filters: Optional[dict] = None) -> dict:
         if sess_id is None:
             raise ValueError("sess_id must not be None")
 
-        # 1️⃣ Stop if already taken over
-        if self._is_taken_over(sess_id):
-            return "A human support agent is handling your chat now."
-
         question = question.strip()
         if not question:
             raise ValueError("Question cannot be empty")
 
-        # 2️⃣ Save user message
-        self._save_message(sess_id, "user", question)
+        return {
+            "sess_id": sess_id,
+            "question": question,
+            "asked_at": datetime.now(timezone.utc),
+            "query_embedding": None,
+            "scope": answer_cache_scope(filters),
+            "flight_key": None,
+            "cacheable": False,
+            "messages": None,
+            "reply": None,
+            "kb_chunks": [],
+            "deadline": time.monotonic() + settings.QA_DEADLINE_SECONDS,
+            "timer": StageTimer(),
+            "persisted": False,
+        }
 
-        # 3️⃣ Embedding + KB Search
-        query_embedding, embedding_tokens = self.embedding_service.create_embedding(
-            question
-        )
-        kb_chunks = search_similar_chunks(
-            db=self.db, query_embedding=query_embedding, top_k=5
-        )
+    async def _prepare(self, turn: dict, filters: Optional[dict] = None):
+        """
+        Steps shared by ask() and ask_stream() up to the LLM call, on a turn
+        from _new_turn().
 
-        # 4️⃣ Build LLM messages
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a knowledge-based assistant. Answer ONLY using the provided knowledge base and conversation history. If the answer is not present, say: 'I don't know.'",
-            }
-        ]
+        Returns the turn dict: "reply" is set when no LLM call is needed
+        (human takeover, FAQ / answer cache hit), otherwise "messages" holds
+        the prompt. "query_embedding" / "scope" / "cacheable" feed the answer
+        cache, "kb_chunks" the extractive fallback, "deadline" (monotonic)
+        bounds embedding, retrieval, history and the LLM call, "timer"
+        records the stages. A stage that runs past the deadline ends the turn
+        with the extractive answer (NO_ANSWER_IN_TIME before retrieval).
 
-        if kb_chunks:
-            messages.append(
-                {
-                    "role": "system",
-                    "content": "Knowledge Base:\n"
-                    + "\n\n".join(kb_chunks),
-                }
-            )
+        Independent stages overlap:
 
-        previous_chats = (
-            self.db.query(Chat)
-            .filter(Chat.sess_id == sess_id)
-            .order_by(Chat.created_at.asc())
-            .all()
-        )
+          embedding ─────────────────┐
+          history (own session) ─────┼──────────────┐
+          session state → faq hash ──┴→ cache lookup │
+                                     └→ retrieval ───┴→ prompt
 
-        for chat in previous_chats:
-            role = "user" if chat.sender == "user" else "assistant"
-            messages.append({"role": role, "content": chat.message})
+        Nothing is written here unless the turn ends without an LLM call;
+        otherwise the question is persisted with the answer in _finish().
+        Callers keep the question (_keep_question) when a stage here fails.
+        """
+        sess_id, question, scope, timer = turn["sess_id"], turn["question"], turn["scope"], turn["timer"]
 
-        messages.append({"role": "user", "content": question})
+        # started right away, awaited when needed
+        embed_task = asyncio.create_task(timer.track("embedding", self._embed(question)))
+        history_task = asyncio.create_task(timer.track("history", self._load_history(sess_id)))
+        retrieve_task = None
 
-        # 5️⃣ Call OpenAI
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini", messages=messages
-        )
+        try:
+            with timer.stage("session_db"):
+                # 1️⃣ Stop if already taken over
+                status, kb_version = await self._session_state(sess_id)
+                if status == "pending_agent":
+                    turn["reply"] = "A human support agent is handling your chat now."
+                    return turn
 
-        usage = response.usage
-        answer = response.choices[0].message.content.strip()
+                faq_enabled = settings.FAQ_FAST_PATH_ENABLED and self._faq_allowed(filters)
 
-        # 6️⃣ Handle bot failure logic
-        if self._bot_does_not_know(answer):
+                # exact (normalised) match on a curated question: one indexed lookup
+                if faq_enabled:
+                    faq_answer = await self._faq_by_hash(question, filters)
+                    if faq_answer:
+                        return await self._reply_without_llm(turn, faq_answer, "faq")
 
-            failure_count = self._get_failure_count(sess_id)
+                flight_key = (normalize_question(question), kb_version, scope)
+                turn["flight_key"] = flight_key
 
-            # Save failure message
-            self._save_message(
-                sess_id,
-                "bot",
-                answer,
-                needs_human=True,
-                prompt_tokens=usage.prompt_tokens,
-                completion_tokens=usage.completion_tokens,
-                total_tokens=usage.total_tokens,
+            # 3️⃣ Embedding + KB Search (coalesced with identical in-flight questions)
+            query_embedding, embedding_tokens = await self._until_deadline(turn, embed_task)
+            turn["query_embedding"] = query_embedding
+
+            # retrieval (own session) overlaps the answer cache lookup
+            retrieve_task = asyncio.create_task(
+                timer.track(
+                    "retrieval", self._retrieve(question, query_embedding, filters, flight_key)
+                )
+            )
+
+            # near-duplicate of an already answered question (same KB version)
+            cached = await timer.track(
+                "answer_cache", answer_cache.lookup(self.db, query_embedding, scope)
             )
+            if cached:
+                return await self._reply_without_llm(turn, cached["answer"], "cache")
+
+            found_chunks = await self._until_deadline(turn, retrieve_task)
+
+            # near-verbatim curated question: return the stored answer as is
+            if faq_enabled:
+                faq_answer = self._faq_by_similarity(found_chunks)
+                if faq_answer:
+                    return await self._reply_without_llm(turn, faq_answer, "faq")
+
+            kb_chunks = select_relevant_chunks(found_chunks)
+            turn["kb_chunks"] = kb_chunks
+
+            # 4️⃣ Build LLM messages (token budget: KB + recent turns + summary)
+            summary, previous_chats = await self._until_deadline(turn, history_task)
+
+            # read-only so far: give the pooled connection back before the LLM call
+            await self.db.commit()
 
-            # ✅ If failures < 5 → DO NOT transfer yet
-            if failure_count < 5:
-                return answer
+        except asyncio.TimeoutError:
+            logging.warning("QA sess=%s: deadline hit before the LLM call, extractive answer", sess_id)
+            return await self._reply_without_llm(turn, self._extractive_answer(turn), "extractive")
 
-            # 🔥 6th failure → Transfer to human
-            session_exists = (
-                self.db.query(ConversationSession)
-                .filter(ConversationSession.sess_id == sess_id)
-                .first()
+        finally:
+            # early return / error: stop waiting on stages nobody needs any more
+            for task in (embed_task, history_task, retrieve_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        history = [
+            ("user" if chat.sender == "user" else "assistant", chat.message)
+            for chat in previous_chats
+        ]
+
+        with timer.stage("assemble"):
+            messages, left_out = self.context_assembler.assemble(
+                SYSTEM_PROMPT,
+                question,
+                kb_chunks,
+                history,
+                summary=summary.summary if summary else None,
             )
 
-            if not session_exists:
-                session = ConversationSession(
-                    sess_id=sess_id,
-                    status="pending_agent",
-                )
-                self.db.add(session)
-                self.db.commit()
-
-                # Notify agents
-                await WebSocketManager.broadcast_to_agents(
-                    {
-                        "type": "NEW_ALERT",
-                        "sess_id": sess_id,
-                        "session_id": session.id,
-                    }
-                )
+        if left_out or len(history) > settings.QA_SUMMARY_TRIGGER_MESSAGES:
+            schedule_summary_refresh(sess_id)
 
-                # Notify user
-                await WebSocketManager.send_to_user(
-                    sess_id,
-                    {
-                        "type": "human_alert",
-                        "message": "I was unable to answer multiple times. A human agent has now been notified.",
-                    },
-                )
+        # only answers that do not depend on earlier turns are reusable
+        turn["cacheable"] = not history and summary is None
+        turn["messages"] = messages
+        return turn
 
-            return "I was unable to answer multiple times. A human agent has now been notified."
+    async def _remember(self, turn: dict, answer: str):
+        # stored through self.db; committed together with the bot message.
+        # a coalesced answer is stored once, by the caller that produced it
+        if (
+            turn["cacheable"]
+            and not turn.get("answer_shared")
+            and not self._bot_does_not_know(answer)
+        ):
+            # kb_version as read before retrieval, not the one current now
+            await answer_cache.store(
+                self.db,
+                turn["question"],
+                turn["query_embedding"],
+                answer,
+                kb_version=turn["flight_key"][1],
+                scope=turn["scope"],
+            )
+
+    async def _finish(self, turn: dict, answer: str, usage, answer_source: str = "llm") -> str:
+        """
+        Persist the turn in one transaction: the question, the bot answer
+        (+ token usage) and, for "I don't know", the session failure counter
+        and handoff. Returns the reply the user should end up with.
+        """
+        sess_id = turn["sess_id"]
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        total_tokens = getattr(usage, "total_tokens", 0) or 0
+
+        self._save_question(turn)
 
         # 7️⃣ Save normal bot answer
+        if not self._bot_does_not_know(answer):
+            self._save_message(
+                sess_id,
+                "bot",
+                answer,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=total_tokens,
+                answer_source=answer_source,
+            )
+            await self._commit_turn(turn)
+            return answer
+
+        # 6️⃣ Handle bot failure logic
         self._save_message(
             sess_id,
             "bot",
             answer,
-            prompt_tokens=usage.prompt_tokens,
-            completion_tokens=usage.completion_tokens,
-            total_tokens=usage.total_tokens,
+            needs_human=True,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            answer_source=answer_source,
         )
+        session_id, failure_count, status = await self._record_failure(sess_id)
+
+        # ✅ First 5 failures → DO NOT transfer yet
+        if failure_count <= 5:
+            await self._commit_turn(turn)
+            return answer
+
+        # 🔥 6th failure → Transfer to human
+        handed_off = await self._request_handoff(session_id)
+        await self._commit_turn(turn)
+
+        if handed_off:
+            # Notify agents
+            await WebSocketManager.broadcast_to_agents(
+                {
+                    "type": "NEW_ALERT",
+                    "sess_id": sess_id,
+                    "session_id": session_id,
+                }
+            )
+
+            # Notify user
+            await WebSocketManager.send_to_user(
+                sess_id,
+                {
+                    "type": "human_alert",
+                    "message": "I was unable to answer multiple times. A human agent has now been notified.",
+                },
+            )
+
+        return "I was unable to answer multiple times. A human agent has now been notified."
+
+    async def _keep_question(self, turn: dict):
+        # no answer could be produced: the question is still part of the chat
+        if turn["persisted"]:
+            return
+        await self.db.rollback()
+        self._save_question(turn)
+        await self._commit_turn(turn)
+
+    def _keep_interrupted(self, turn: dict, parts: list):
+        """
+        The client went away mid-turn: the question (and what was streamed
+        so far) still belong in the chat. Saved by its own task on its own
+        session — the cancellation tearing down the request would cut
+        anything awaited here short.
+        """
+        if turn["persisted"]:
+            return
 
+        async def save():
+            try:
+                async with AsyncSessionLocal() as db:
+                    db.add(
+                        Chat(
+                            sess_id=turn["sess_id"],
+                            sender="user",
+                            message=turn["question"],
+                            created_at=turn["asked_at"],
+                        )
+                    )
+                    partial = "".join(parts).strip()
+                    if partial:
+                        db.add(
+                            Chat(
+                                sess_id=turn["sess_id"],
+                                sender="bot",
+                                message=partial,
+                                answer_source="partial",
+                            )
+                        )
+                    await db.commit()
+            except Exception:
+                logging.exception("QA sess=%s: could not save interrupted turn", turn["sess_id"])
+
+        turn["persisted"] = True
+        task = asyncio.ensure_future(save())
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+    async def ask(self, question: str, sess_id: int, filters: Optional[dict] = None) -> str:
+        """
+        filters: optional search_similar_chunks restrictions
+        (source_types, file_ids, url_ids, qa_ids, user_id).
+        """
+        turn = self._new_turn(question, sess_id, filters)
+        try:
+            await self._prepare(turn, filters)
+        except Exception:
+            # embedding / retrieval / DB failed before the LLM call
+            await self._keep_question(turn)
+            raise
+        timer = turn["timer"]
+
+        if turn["reply"] is not None:
+            timer.log(f"QA sess={sess_id}")
+            return turn["reply"]
+
+        # 5️⃣ Call OpenAI (extractive answer when the deadline runs out)
+        answer_source = "llm"
+        try:
+            with timer.stage("llm"):
+                answer, usage = await self._complete(turn)
+        except _DEADLINE_ERRORS:
+            logging.warning("QA sess=%s: LLM missed the deadline, extractive answer", sess_id)
+            answer, usage, answer_source = self._extractive_answer(turn), None, "extractive"
+        except Exception:
+            await self._keep_question(turn)
+            raise
+
+        with timer.stage("persist"):
+            if answer_source == "llm":
+                await self._remember(turn, answer)
+            answer = await self._finish(turn, answer, usage, answer_source)
+
+        timer.log(f"QA sess={sess_id}")
         return answer
+
+    async def ask_stream(
+        self, question: str, sess_id: int, filters: Optional[dict] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of ask(). Yields
+
+          {"type": "answer_delta", "delta": "..."}   as tokens arrive
+          {"type": "answer_done", "answer": "...", "usage": {...}}
+
+        The answer is persisted (with token usage) once the stream completes;
+        "answer" in the final frame is what ask() would have returned.
+
+        Deadline: if no token arrived in time the extractive answer is sent
+        as a single delta; a stream cut off midway keeps the partial answer.
+        Hedging only applies to ask().
+
+        Client gone (the task is cancelled or the generator closed before
+        "answer_done"): the question and any partial answer are still saved.
+        """
+        turn = self._new_turn(question, sess_id, filters)
+        parts = []
+        try:
+            async with aclosing(self._stream_turn(turn, filters, parts)) as events:
+                async for event in events:
+                    yield event
+        except _INTERRUPTED:
+            # client disconnected: keep the question and the partial answer
+            logging.info("QA stream sess=%s: client went away mid-turn", sess_id)
+            self._keep_interrupted(turn, parts)
+            raise
+
+    async def _stream_turn(self, turn: dict, filters: Optional[dict], parts: list) -> AsyncIterator[dict]:
+        # body of ask_stream(); streamed text is appended to `parts`
+        sess_id, timer = turn["sess_id"], turn["timer"]
+        try:
+            await self._prepare(turn, filters)
+        except Exception:
+            # embedding / retrieval / DB failed before the LLM call
+            await self._keep_question(turn)
+            raise
+
+        if turn["reply"] is not None:
+            timer.log(f"QA stream sess={sess_id}")
+            yield {"type": "answer_done", "answer": turn["reply"], "usage": None}
+            return
+
+        # 5️⃣ Call OpenAI (streamed; the last chunk carries usage)
+        usage = None
+        answer_source = "llm"
+        try:
+            with timer.stage("llm"):
+                async with aclosing(self._stream_completion(turn)) as chunks:
+                    async for chunk in chunks:
+                        if chunk.usage:
+                            usage = chunk.usage
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if not parts:
+                                timer.mark("first_token")
+                            delta = chunk.choices[0].delta.content
+                            parts.append(delta)
+                            yield {"type": "answer_delta", "delta": delta}
+        except _DEADLINE_ERRORS:
+            if parts:
+                logging.warning("QA stream sess=%s: deadline hit, keeping partial answer", sess_id)
+                answer_source = "partial"
+            else:
+                logging.warning("QA stream sess=%s: LLM missed the deadline, extractive answer", sess_id)
+                answer_source = "extractive"
+                parts.append(self._extractive_answer(turn))
+                yield {"type": "answer_delta", "delta": parts[0]}
+        except Exception:
+            await self._keep_question(turn)
+            raise
+
+        with timer.stage("persist"):
+            answer = "".join(parts).strip()
+            if answer_source == "llm":
+                await self._remember(turn, answer)
+            answer = await self._finish(turn, answer, usage, answer_source)
+
+        timer.log(f"QA stream sess={sess_id}")
+
+        yield {
+            "type": "answer_done",
+            "answer": answer,
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(usage, "completion_tokens", 0),
+                "total_tokens": getattr(usage, "total_tokens", 0),
+            },
+        }
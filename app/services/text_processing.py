@@ -0,0 +1,65 @@
+# app/services/text_processing.py
+"""
+CPU-bound text helpers for ingestion (HTML -> text, token chunking).
+
+Plain top-level functions with light imports: they run in cpu_pool worker
+processes, which import this module on their own (spawn).
+"""
+from typing import List, Tuple
+from urllib.parse import urljoin
+
+import tiktoken
+from bs4 import BeautifulSoup
+
+_NOISE_TAGS = ["script", "style", "noscript", "header", "footer", "nav", "aside"]
+
+
+def _soup_text(soup: BeautifulSoup) -> str:
+    for tag in soup(_NOISE_TAGS):
+        tag.decompose()
+
+    text = soup.get_text(separator="\n")
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if len(line) > 25]
+
+    return "\n".join(lines)
+
+
+def parse_html_page(html: str, page_url: str) -> Tuple[str, List[str]]:
+    """
+    One parse per crawled page: (clean text, absolute link URLs).
+    Links are collected before nav/header/footer are stripped from the text.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    links = [urljoin(page_url, link["href"]) for link in soup.find_all("a", href=True)]
+    return _soup_text(soup), links
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = 800,
+    overlap: int = 100,
+    model: str = "text-embedding-3-small",
+) -> List[str]:
+    encoder = tiktoken.encoding_for_model(model)
+    tokens = encoder.encode(text)
+
+    chunks = []
+    start = 0
+
+    while start < len(tokens):
+        end = start + max_tokens
+        chunk_tokens = tokens[start:end]
+        chunk = encoder.decode(chunk_tokens)
+
+        if chunk.strip():
+            chunks.append(chunk)
+
+        start += max_tokens - overlap
+
+    return chunks
+
+
+def encode_text(text: str, model: str = "text-embedding-3-small") -> List[int]:
+    # token ids of one segment; the streaming chunker stitches segments together
+    return tiktoken.encoding_for_model(model).encode(text)
@@ -1,29 +1,613 @@
 # app/services/vector_search.py
 
+import asyncio
+import logging
+from typing import List, Optional, Sequence
+
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, bindparam
 from pgvector.sqlalchemy import Vector
 
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.answer_cache import answer_cache
+from app.services.local_vector_index import local_vector_index
+from app.services.pgvector_capabilities import MAX_EF_SEARCH, pgvector_capabilities
+from app.services.embedding_service import shorten_embedding
+
+
+def _use_local_index() -> bool:
+    return settings.VECTOR_SEARCH_BACKEND.lower() == "numpy"
+
+
+def notify_embeddings_changed(db: Session, removed_ids: Optional[Sequence[int]] = None):
+    """
+    Call after committing file_embeddings changes: the in-process index
+    picks up new rows and drops removed_ids immediately (numpy backend only)
+    and cached answers built on the previous knowledge base are invalidated.
+    """
+    if _use_local_index():
+        if removed_ids:
+            local_vector_index.remove(removed_ids)
+        local_vector_index.refresh(db)
+
+    answer_cache.invalidate(db)
+
+
+# every search returns a list of dicts with these keys (plus "distance",
+# cosine distance to the query, and "lexical_match")
+_CHUNK_COLUMNS = "id, text_content, source_type, file_id, url_id, qa_id"
+
+
+def _fetch_chunks(db: Session, ids, query_embedding) -> dict:
+    if not ids:
+        return {}
 
-def search_similar_chunks(db: Session, query_embedding, top_k: int = 5):
     sql = (
-        text("""
-            SELECT text_content
+        text(f"""
+            SELECT {_CHUNK_COLUMNS}, embedding <=> :embedding AS distance
+            FROM file_embeddings
+            WHERE id IN :ids
+        """)
+        .bindparams(
+            bindparam("ids", expanding=True),
+            bindparam("embedding", type_=Vector(1536)),
+        )
+    )
+    result = db.execute(sql, {"ids": list(ids), "embedding": query_embedding})
+    return {row.id: dict(row._mapping) for row in result}
+
+
+def select_relevant_chunks(
+    chunks: List[dict],
+    min_similarity: Optional[float] = None,
+    max_score_gap: Optional[float] = None,
+) -> List[dict]:
+    """
+    Adaptive top-k over search_similar_chunks() results.
+
+    - drops chunks whose similarity (1 - distance) is below min_similarity
+    - sorts by similarity and cuts at the first drop larger than
+      max_score_gap, so a clear winner is not padded with filler chunks
+
+    Full-text hits from hybrid search are exact token matches and are
+    kept regardless. The original (ranking) order is preserved.
+    """
+    if min_similarity is None:
+        min_similarity = settings.RETRIEVAL_MIN_SIMILARITY
+    if max_score_gap is None:
+        max_score_gap = settings.RETRIEVAL_MAX_SCORE_GAP
+
+    def similarity(chunk):
+        return 1.0 - chunk["distance"]
+
+    scored = sorted(
+        (chunk for chunk in chunks if not chunk.get("lexical_match")),
+        key=similarity,
+        reverse=True,
+    )
+
+    keep = set()
+    previous = None
+    for chunk in scored:
+        score = similarity(chunk)
+        if score < min_similarity:
+            break
+        if max_score_gap and previous is not None and previous - score > max_score_gap:
+            break
+        keep.add(chunk["id"])
+        previous = score
+
+    return [chunk for chunk in chunks if chunk["id"] in keep or chunk.get("lexical_match")]
+
+
+# filter argument -> file_embeddings column
+_LIST_FILTERS = {
+    "source_types": "source_type",
+    "file_ids": "file_id",
+    "url_ids": "url_id",
+    "qa_ids": "qa_id",
+}
+
+
+def _build_filters(
+    source_types=None,
+    file_ids=None,
+    url_ids=None,
+    qa_ids=None,
+    user_id: Optional[int] = None,
+) -> dict:
+    filters = {
+        "source_types": source_types,
+        "file_ids": file_ids,
+        "url_ids": url_ids,
+        "qa_ids": qa_ids,
+        "user_id": user_id,
+    }
+    return {key: value for key, value in filters.items() if value is not None}
+
+
+def _filter_conditions(filters: dict):
+    """
+    Returns (conditions, params, expanding_bindparams) for a WHERE clause.
+
+    A single source_type is rendered as "=" so the planner can pick the
+    matching partial ANN index (ix_file_embeddings_embedding_ann_<type>).
+    """
+    conditions, params, binds = [], {}, []
+
+    for key, column in _LIST_FILTERS.items():
+        values = filters.get(key)
+        if values is None:
+            continue
+
+        values = list(values)
+        if len(values) == 1:
+            conditions.append(f"{column} = :f_{key}")
+            params[f"f_{key}"] = values[0]
+        else:
+            conditions.append(f"{column} IN :f_{key}")
+            params[f"f_{key}"] = values
+            binds.append(bindparam(f"f_{key}", expanding=True))
+
+    if filters.get("user_id") is not None:
+        conditions.append("user_id = :f_user_id")
+        params["f_user_id"] = filters["user_id"]
+
+    return conditions, params, binds
+
+
+def _where(conditions, prefix: str = "WHERE") -> str:
+    return f"{prefix} " + " AND ".join(conditions) if conditions else ""
+
+
+# plainto_tsquery ANDs every word of the question; OR them instead so a
+# single exact token (SKU, error code, product name) is enough to match
+_TSQUERY = (
+    "CAST(replace(CAST(plainto_tsquery('english', :query_text) AS text), '&', '|') AS tsquery)"
+)
+
+
+def _rrf_fuse(*rankings, rrf_k: int):
+    """
+    Reciprocal-rank fusion: score(id) = sum(1 / (rrf_k + rank)) over rankings.
+    Each ranking is a list of ids, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _lexical_ids(db: Session, query_text: str, limit: int, filters: dict):
+    conditions, params, binds = _filter_conditions(filters)
+
+    sql = text(f"""
+        SELECT id
+        FROM file_embeddings, (SELECT {_TSQUERY} AS query) q
+        WHERE text_search @@ q.query {_where(conditions, "AND")}
+        ORDER BY ts_rank_cd(text_search, q.query) DESC
+        LIMIT :k
+    """).bindparams(*binds)
+
+    params.update({"query_text": query_text, "k": limit})
+    return [row[0] for row in db.execute(sql, params)]
+
+
+def _search_local(
+    db: Session,
+    query_embedding,
+    top_k: int,
+    filters: dict,
+    query_text: Optional[str] = None,
+):
+    local_vector_index.maybe_refresh(db, settings.LOCAL_VECTOR_INDEX_REFRESH_SECONDS)
+
+    if query_text:
+        candidates = max(settings.HYBRID_CANDIDATES, top_k)
+        semantic = [
+            chunk_id
+            for chunk_id, _ in local_vector_index.search(query_embedding, top_k=candidates, filters=filters)
+        ]
+        lexical = _lexical_ids(db, query_text, candidates, filters)
+        ids = _rrf_fuse(semantic, lexical, rrf_k=settings.RRF_K)[:top_k]
+    else:
+        lexical = []
+        ids = [
+            chunk_id
+            for chunk_id, _ in local_vector_index.search(query_embedding, top_k=top_k, filters=filters)
+        ]
+
+    chunks = _fetch_chunks(db, ids, query_embedding)
+    lexical = set(lexical)
+
+    # deleted in Postgres (e.g. by another worker's re-ingestion): drop here too
+    missing = [chunk_id for chunk_id in ids if chunk_id not in chunks]
+    if missing:
+        local_vector_index.remove(missing)
+
+    return [
+        {**chunks[chunk_id], "lexical_match": chunk_id in lexical}
+        for chunk_id in ids
+        if chunk_id in chunks
+    ]
+
+
+def _search_param_statements(
+    top_k: int,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    filtered: bool = False,
+) -> list:
+    # SET LOCAL only lives until the end of the current transaction,
+    # so the knob never leaks to other requests sharing the pooled connection
+    index_type = "ivfflat" if settings.VECTOR_INDEX_TYPE.lower() == "ivfflat" else "hnsw"
+    statements = []
+
+    # pgvector >= 0.8: keep scanning the index until enough rows pass the
+    # WHERE clause instead of post-filtering a fixed candidate list.
+    # Older versions: post-filter a wider candidate list.
+    iterative_scan = pgvector_capabilities.iterative_scan_mode() if filtered else None
+    widen = filtered and iterative_scan is None
+
+    if index_type == "ivfflat":
+        probes = probes or settings.IVFFLAT_PROBES
+        if widen:
+            probes = min(probes * settings.VECTOR_FILTERED_SCAN_FACTOR, settings.IVFFLAT_LISTS)
+        statements.append(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+    else:
+        # hnsw can never return more than ef_search rows
+        ef_search = max(ef_search or settings.HNSW_EF_SEARCH, top_k)
+        if widen:
+            ef_search = min(ef_search * settings.VECTOR_FILTERED_SCAN_FACTOR, MAX_EF_SEARCH)
+        statements.append(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+    if iterative_scan:
+        statements.append(text(f"SET LOCAL {index_type}.iterative_scan = {iterative_scan}"))
+
+    return statements
+
+
+# compact distance used to shortlist candidates before the exact re-rank;
+# each expression matches an expression index from the quantized-index
+# migration, so the shortlist scan never touches full-precision vectors
+_SHORTLIST_DISTANCES = {
+    "halfvec": "CAST(embedding AS halfvec(1536)) <#> CAST(:embedding AS halfvec(1536))",
+    "binary": (
+        "CAST(binary_quantize(embedding) AS bit(1536))"
+        " <~> binary_quantize(CAST(:embedding AS vector(1536)))"
+    ),
+    # leading-dimension (Matryoshka) copy stored in its own column
+    "matryoshka": "embedding_short <=> :embedding_short",
+}
+
+# index each shortlist scan relies on (names from the quantized-index and
+# embedding_short migrations). Those migrations only build the index when VECTOR_SHORTLIST
+# was set while they ran: without it the shortlist is a sequential scan
+_SHORTLIST_INDEXES = {
+    "halfvec": "ix_file_embeddings_embedding_halfvec",
+    "binary": "ix_file_embeddings_embedding_binary",
+    # embedding_short column migration (the column itself is always backfilled)
+    "matryoshka": "ix_file_embeddings_embedding_short_ann",
+}
+
+_missing_index_logged: set = set()
+
+
+def _shortlist_mode() -> Optional[str]:
+    mode = (settings.VECTOR_SHORTLIST or "none").lower()
+    if mode == "none":
+        return None
+    if mode not in _SHORTLIST_DISTANCES:
+        raise ValueError(f"Unsupported VECTOR_SHORTLIST: {mode}")
+
+    index_name = _SHORTLIST_INDEXES.get(mode)
+    if index_name and not pgvector_capabilities.has_index(index_name):
+        # plain <=> search on the regular ANN index instead
+        if mode not in _missing_index_logged:
+            _missing_index_logged.add(mode)
+            logging.warning(
+                "VECTOR_SHORTLIST=%s but index %s does not exist; searching without the shortlist. "
+                "Build it (see the shortlist index migrations) or unset VECTOR_SHORTLIST.",
+                mode,
+                index_name,
+            )
+        return None
+    return mode
+
+
+def _scan_size(limit: int) -> int:
+    # rows the ANN index itself has to produce for one search
+    if _shortlist_mode():
+        return max(settings.VECTOR_SHORTLIST_SIZE, limit)
+    return limit
+
+
+def _vector_binds():
+    binds = [bindparam("embedding", type_=Vector(1536))]  # ✅ only this matters
+    if _shortlist_mode() == "matryoshka":
+        binds.append(bindparam("embedding_short", type_=Vector()))
+    return binds
+
+
+def _shortlist_params(query_embedding) -> dict:
+    if _shortlist_mode() == "matryoshka":
+        return {"embedding_short": shorten_embedding(query_embedding)}
+    return {}
+
+
+def _nearest_sql(conditions, limit_param: str) -> str:
+    """
+    Subquery yielding the chunk columns plus distance for the
+    :limit_param nearest chunks.
+
+    With a shortlist mode the compact index picks :shortlist candidates and
+    they are re-ranked by exact inner product (OpenAI vectors are unit
+    length, so this is the same order as cosine).
+    """
+    mode = _shortlist_mode()
+
+    if not mode:
+        return f"""
+            SELECT {_CHUNK_COLUMNS}, embedding <=> :embedding AS distance
             FROM file_embeddings
+            {_where(conditions)}
             ORDER BY embedding <=> :embedding
+            LIMIT :{limit_param}
+        """
+
+    return f"""
+        SELECT {_CHUNK_COLUMNS}, embedding <=> :embedding AS distance
+        FROM (
+            SELECT {_CHUNK_COLUMNS}, embedding
+            FROM file_embeddings
+            {_where(conditions)}
+            ORDER BY {_SHORTLIST_DISTANCES[mode]}
+            LIMIT :shortlist
+        ) shortlist
+        ORDER BY embedding <#> :embedding
+        LIMIT :{limit_param}
+    """
+
+
+def _hybrid_query(query_embedding, query_text: str, top_k: int, filters: dict):
+    conditions, params, binds = _filter_conditions(filters)
+
+    # both candidate lists and the RRF fusion in one round trip
+    sql = (
+        text(f"""
+            WITH semantic AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                FROM ({_nearest_sql(conditions, "candidates")}) nearest
+            ),
+            lexical AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+                FROM (
+                    SELECT id, ts_rank_cd(text_search, q.query) AS score
+                    FROM file_embeddings, (SELECT {_TSQUERY} AS query) q
+                    WHERE text_search @@ q.query {_where(conditions, "AND")}
+                    ORDER BY score DESC
+                    LIMIT :candidates
+                ) matches
+            ),
+            fused AS (
+                SELECT
+                    COALESCE(s.id, l.id) AS id,
+                    COALESCE(1.0 / (:rrf_k + s.rank), 0.0)
+                        + COALESCE(1.0 / (:rrf_k + l.rank), 0.0) AS score,
+                    l.id IS NOT NULL AS lexical_match
+                FROM semantic s
+                FULL OUTER JOIN lexical l ON l.id = s.id
+            )
+            SELECT
+                fe.id, fe.text_content, fe.source_type, fe.file_id, fe.url_id, fe.qa_id,
+                fe.embedding <=> :embedding AS distance,
+                fused.lexical_match
+            FROM fused
+            JOIN file_embeddings fe ON fe.id = fused.id
+            ORDER BY fused.score DESC
             LIMIT :k
         """)
         .bindparams(
-            bindparam("embedding", type_=Vector(1536)),  # ✅ only this matters
+            *_vector_binds(),
+            *binds,
+        )
+    )
+
+    params.update(
+        {
+            "embedding": query_embedding,
+            "query_text": query_text,
+            "candidates": max(settings.HYBRID_CANDIDATES, top_k),
+            "shortlist": _scan_size(max(settings.HYBRID_CANDIDATES, top_k)),
+            "rrf_k": settings.RRF_K,
+            "k": top_k,
+            **_shortlist_params(query_embedding),
+        }
+    )
+    return sql, params
+
+
+def _vector_query(query_embedding, top_k: int, filters: dict):
+    conditions, params, binds = _filter_conditions(filters)
+
+    sql = (
+        text(f"""
+            SELECT nearest.*, false AS lexical_match
+            FROM ({_nearest_sql(conditions, "k")}) nearest
+            ORDER BY distance
+        """)
+        .bindparams(
+            *_vector_binds(),
+            *binds,
         )
     )
 
-    result = db.execute(
-        sql,
+    params.update(
         {
             "embedding": query_embedding,
             "k": top_k,  # plain int is fine
+            "shortlist": _scan_size(top_k),
+            **_shortlist_params(query_embedding),
         }
     )
+    return sql, params
+
+
+def _pgvector_search_plan(
+    query_embedding,
+    top_k: int,
+    filters: dict,
+    hybrid: bool,
+    query_text: Optional[str] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+):
+    """
+    (setup_statements, sql, params) for one pgvector search, shared by the
+    sync and async entry points so both run exactly the same SQL.
+    """
+    statements = _search_param_statements(
+        _scan_size(max(settings.HYBRID_CANDIDATES, top_k) if hybrid else top_k),
+        ef_search=ef_search,
+        probes=probes,
+        filtered=bool(filters),
+    )
+
+    if hybrid:
+        sql, params = _hybrid_query(query_embedding, query_text, top_k, filters)
+    else:
+        sql, params = _vector_query(query_embedding, top_k, filters)
+
+    return statements, sql, params
+
+
+def search_similar_chunks(
+    db: Session,
+    query_embedding,
+    top_k: int = 5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    query_text: Optional[str] = None,
+    mode: Optional[str] = None,
+    source_types: Optional[List[str]] = None,
+    file_ids: Optional[List[int]] = None,
+    url_ids: Optional[List[int]] = None,
+    qa_ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None,
+):
+    """
+    Returns up to top_k chunks, best first:
+    [{id, text_content, distance, source_type, file_id, url_id, qa_id,
+      lexical_match}, ...]
+
+    mode: "vector" | "hybrid" (defaults to settings.RETRIEVAL_MODE).
+    Hybrid needs the raw query_text and falls back to vector without it.
+
+    source_types / file_ids / url_ids / qa_ids / user_id (tenant) restrict
+    the search inside the index scan, not after a global top-k.
+    """
+    mode = (mode or settings.RETRIEVAL_MODE).lower()
+    hybrid = mode == "hybrid" and bool(query_text and query_text.strip())
+
+    filters = _build_filters(
+        source_types=source_types,
+        file_ids=file_ids,
+        url_ids=url_ids,
+        qa_ids=qa_ids,
+        user_id=user_id,
+    )
+
+    if _use_local_index():
+        return _search_local(
+            db, query_embedding, top_k, filters, query_text=query_text if hybrid else None
+        )
+
+    pgvector_capabilities.load(db)
+
+    statements, sql, params = _pgvector_search_plan(
+        query_embedding,
+        top_k,
+        filters,
+        hybrid,
+        query_text=query_text,
+        ef_search=ef_search,
+        probes=probes,
+    )
+
+    for statement in statements:
+        db.execute(statement)
+
+    result = db.execute(sql, params)
+
+    return [dict(row._mapping) for row in result.fetchall()]
+
+
+def _search_local_in_thread(query_embedding, top_k: int, filters: dict, query_text: Optional[str]):
+    # the numpy backend is sync (refresh + matrix scan); give it its own session
+    db = SessionLocal()
+    try:
+        return _search_local(db, query_embedding, top_k, filters, query_text=query_text)
+    finally:
+        db.close()
+
+
+async def asearch_similar_chunks(
+    db: AsyncSession,
+    query_embedding,
+    top_k: int = 5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    query_text: Optional[str] = None,
+    mode: Optional[str] = None,
+    source_types: Optional[List[str]] = None,
+    file_ids: Optional[List[int]] = None,
+    url_ids: Optional[List[int]] = None,
+    qa_ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None,
+):
+    """
+    Async (asyncpg) variant of search_similar_chunks — same arguments,
+    same SQL, same result shape. The numpy backend runs in a worker thread.
+    """
+    mode = (mode or settings.RETRIEVAL_MODE).lower()
+    hybrid = mode == "hybrid" and bool(query_text and query_text.strip())
+
+    filters = _build_filters(
+        source_types=source_types,
+        file_ids=file_ids,
+        url_ids=url_ids,
+        qa_ids=qa_ids,
+        user_id=user_id,
+    )
+
+    if _use_local_index():
+        return await asyncio.to_thread(
+            _search_local_in_thread,
+            query_embedding,
+            top_k,
+            filters,
+            query_text if hybrid else None,
+        )
+
+    await pgvector_capabilities.aload(db)
+
+    statements, sql, params = _pgvector_search_plan(
+        query_embedding,
+        top_k,
+        filters,
+        hybrid,
+        query_text=query_text,
+        ef_search=ef_search,
+        probes=probes,
+    )
+
+    for statement in statements:
+        await db.execute(statement)
+
+    result = await db.execute(sql, params)
 
-    return [row[0] for row in result.fetchall()]
\ No newline at end of file
+    return [dict(row._mapping) for row in result.fetchall()]
@@ -1,35 +1,76 @@
 # app/services/website_kb_service.py
 
 import random
-import tiktoken
-from urllib.parse import urljoin, urlparse
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlparse
 from collections import deque
 
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
+from app.core.cpu_pool import cpu_pool
 from app.models.file_embedding import FileEmbedding
+from app.services.chunk_sync import sync_chunks
 from app.services.embedding_service import EmbeddingService
+from app.services.text_processing import chunk_text, parse_html_page
+from app.services.vector_search import notify_embeddings_changed
 
 
 class WebsiteKBService:
     def __init__(self, db: Session):
         self.db = db
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = EmbeddingService(db)
 
     # =========================================================
     # ADD WEBSITE (WITH INTERNAL CRAWLING)
     # =========================================================
-    def add_website(self, url: str, max_pages: int = 50, max_depth: int = 3):
+    def find_url_id(self, url: str, tenant_id: Optional[int] = None):
+        # update mode: the same tenant's most recent crawl of the start URL
+        return (
+            self.db.query(FileEmbedding.url_id)
+            .filter(
+                FileEmbedding.source_type == "kb_url",
+                FileEmbedding.source_url == url,
+                FileEmbedding.user_id.is_(None) if tenant_id is None else FileEmbedding.user_id == tenant_id,
+            )
+            .order_by(FileEmbedding.id.desc())
+            .limit(1)
+            .scalar()
+        )
+
+    def add_website(
+        self,
+        url: str,
+        max_pages: int = 50,
+        max_depth: int = 3,
+        progress: Optional[Callable[[int, str], None]] = None,
+        update: bool = False,
+        tenant_id: Optional[int] = None,
+    ):
+        """
+        update: re-crawl of a site that is already in the knowledge base.
+        Its url_id is reused and chunks are diffed by content hash: only new /
+        changed chunks are embedded, removed ones deleted, in one transaction.
+        Without a previous crawl of the URL it behaves like a first crawl.
+
+        tenant_id: owner of the chunks (file_embeddings.user_id); QA searches
+        with a tenant filter only see their own tenant's crawls.
+
+        progress(percent, message): optional, called per crawled page and
+        between stages (ingestion jobs report it as job progress).
+        """
+        progress = progress or (lambda percent, message: None)
+
         url = url.strip()
         if not url:
             raise ValueError("URL is required")
 
-        crawled_text = self._crawl_website(
+        crawled_text, pages_crawled = self._crawl_website(
             base_url=url,
             max_pages=max_pages,
             max_depth=max_depth,
+            progress=progress,
         )
 
         if not crawled_text.strip():
@@ -40,42 +81,59 @@ class WebsiteKBService:
         if not chunks:
             raise RuntimeError("Failed to chunk website content")
 
-        inserted_rows = 0
-        generated_url_id = random.getrandbits(63)
-
-        for idx, chunk in enumerate(chunks):
-            embedding_vector, tokens_used = self.embedding_service.create_embedding(chunk)
-
-            if not embedding_vector:
-                continue
-
-            db_embedding = FileEmbedding(
-                embedding=embedding_vector,
-                text_content=chunk,
-                source_type="kb_url",
-                url_id=generated_url_id,
-                source_url=url if idx == 0 else None,
-                embedding_tokens=tokens_used,
-            )
+        url_id = self.find_url_id(url, tenant_id) if update else None
+        updated = url_id is not None
+        if url_id is None:
+            url_id = random.getrandbits(63)
+
+        progress(60, f"embedding changed chunks of {len(chunks)}")
+        result = sync_chunks(
+            self.db,
+            self.embedding_service,
+            source_filter={"url_id": url_id},
+            chunks=chunks,
+            row_fields={"url_id": url_id, "source_type": "kb_url", "user_id": tenant_id},
+        )
 
-            self.db.add(db_embedding)
-            inserted_rows += 1
+        progress(90, "saving embeddings")
+        # the start URL lives on the first row of the site
+        self.db.flush()
+        self.db.execute(
+            text("""
+                UPDATE file_embeddings SET source_url = :url
+                WHERE id = (SELECT min(id) FROM file_embeddings WHERE url_id = :url_id)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM file_embeddings
+                      WHERE url_id = :url_id AND source_url IS NOT NULL
+                  )
+            """),
+            {"url": url, "url_id": url_id},
+        )
 
         self.db.commit()
+        removed_ids = result.pop("removed_ids")
+        notify_embeddings_changed(self.db, removed_ids=removed_ids)
 
         return {
             "url": url,
-            "url_id": generated_url_id,
-            "pages_crawled": len(chunks),
-            "chunks_created": len(chunks),
-            "rows_inserted": inserted_rows,
+            "url_id": url_id,
+            "updated": updated,
+            "pages_crawled": pages_crawled,
+            **result,
             "total_text_length": len(crawled_text),
         }
 
     # =========================================================
     # REAL INTERNAL CRAWLER
     # =========================================================
-    def _crawl_website(self, base_url: str, max_pages: int, max_depth: int) -> str:
+    def _crawl_website(
+        self,
+        base_url: str,
+        max_pages: int,
+        max_depth: int,
+        progress: Optional[Callable[[int, str], None]] = None,
+    ) -> Tuple[str, int]:
+        # -> (text of all pages, number of pages loaded and parsed)
         visited = set()
         queue = deque()
         queue.append((base_url, 0))
@@ -113,19 +171,19 @@ class WebsiteKBService:
                     page.wait_for_timeout(2000)
 
                     html = page.content()
-                    text = self._extract_text(html)
+                    # one parse (in the CPU pool) for the text and the links
+                    text, links = cpu_pool.run(parse_html_page, html, current_url)
 
                     if text.strip():
                         collected_text.append(text)
 
                     visited.add(current_url)
+                    if progress:
+                        # crawling is the first half of the job
+                        progress(len(visited) * 50 // max_pages, f"crawled {len(visited)} pages")
 
                     # extract internal links
-                    soup = BeautifulSoup(html, "html.parser")
-                    for link in soup.find_all("a", href=True):
-                        href = link["href"]
-
-                        full_url = urljoin(current_url, href)
+                    for full_url in links:
                         parsed = urlparse(full_url)
 
                         if parsed.netloc == base_domain:
@@ -139,22 +197,7 @@ class WebsiteKBService:
             context.close()
             browser.close()
 
-        return "\n\n".join(collected_text)
-
-    # =========================================================
-    # TEXT CLEANER
-    # =========================================================
-    def _extract_text(self, html: str) -> str:
-        soup = BeautifulSoup(html, "html.parser")
-
-        for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside"]):
-            tag.decompose()
-
-        text = soup.get_text(separator="\n")
-        lines = [line.strip() for line in text.splitlines()]
-        lines = [line for line in lines if len(line) > 25]
-
-        return "\n".join(lines)
+        return "\n\n".join(collected_text), len(visited)
 
     # =========================================================
     # TOKEN CHUNKING
@@ -166,20 +209,5 @@ class WebsiteKBService:
         overlap: int = 100,
         model: str = "text-embedding-3-small",
     ):
-        encoder = tiktoken.encoding_for_model(model)
-        tokens = encoder.encode(text)
-
-        chunks = []
-        start = 0
-
-        while start < len(tokens):
-            end = start + max_tokens
-            chunk_tokens = tokens[start:end]
-            chunk_text = encoder.decode(chunk_tokens)
-
-            if chunk_text.strip():
-                chunks.append(chunk_text)
-
-            start += max_tokens - overlap
-
-        return chunks
+        # tiktoken encode/decode of a whole document: off the request process
+        return cpu_pool.run(chunk_text, text, max_tokens, overlap, model)
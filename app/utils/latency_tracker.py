@@ -0,0 +1,32 @@
+# app/utils/latency_tracker.py
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent latencies (seconds) for percentile lookups,
+    e.g. "start a hedged request once the call is slower than p95".
+    """
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+
+        if len(samples) < max(min_samples, 1):
+            return None
+        return float(np.percentile(samples, p))
+
+    def __len__(self):
+        return len(self._samples)
@@ -0,0 +1,60 @@
+# app/utils/prefetch.py
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def prefetch(iterable: Iterable[T], maxsize: int, name: str = "prefetch") -> Iterator[T]:
+    """
+    Iterate `iterable` on a background thread, at most `maxsize` items ahead
+    of the consumer (backpressure: the producer blocks on a full queue).
+
+    Exceptions from the producer are re-raised in the consumer; if the
+    consumer stops early (break / exception) the producer is told to stop.
+    """
+    items: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        finally:
+            # run the generator's cleanup (e.g. cancel pending pool tasks)
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put((_DONE, None))
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
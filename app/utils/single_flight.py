@@ -0,0 +1,39 @@
+# app/utils/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller starts fn() as a task; callers arriving while it is
+    still running await the same task. Every caller gets the result (or
+    the exception). Nothing is cached once the task finishes.
+
+    NOTE:
+    Per process and per event loop — like WebSocketManager.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Returns (result, shared); shared is False only for the caller whose
+        call actually ran fn().
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _, key=key: self._calls.pop(key, None))
+
+        # shield: one caller giving up (client disconnect) must not cancel
+        # the call everyone else is waiting for
+        return await asyncio.shield(task), shared
+
+    def __len__(self):
+        return len(self._calls)
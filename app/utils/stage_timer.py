@@ -0,0 +1,52 @@
+# app/utils/stage_timer.py
+import time
+import logging
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Tuple
+
+
+class StageTimer:
+    """
+    Wall-clock timing of (possibly overlapping) pipeline stages.
+
+    Every stage is recorded as (start, end) in ms since the timer was
+    created, so the log shows which stages overlapped and which one was on
+    the critical path.
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self.stages: Dict[str, Tuple[float, float]] = {}
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    @contextmanager
+    def stage(self, name: str):
+        start = self._now()
+        try:
+            yield
+        finally:
+            self.stages[name] = (start, self._now())
+
+    async def track(self, name: str, awaitable: Awaitable):
+        with self.stage(name):
+            return await awaitable
+
+    def mark(self, name: str):
+        # zero-length stage, e.g. "first_token"
+        now = self._now()
+        self.stages[name] = (now, now)
+
+    def as_dict(self) -> dict:
+        return {
+            name: {"start_ms": round(start, 1), "ms": round(end - start, 1)}
+            for name, (start, end) in sorted(self.stages.items(), key=lambda item: item[1][0])
+        }
+
+    def log(self, label: str):
+        parts = " ".join(
+            f"{name}={start:.0f}+{end - start:.0f}ms"
+            for name, (start, end) in sorted(self.stages.items(), key=lambda item: item[1][0])
+        )
+        logging.info("%s total=%.0fms %s", label, self._now(), parts)
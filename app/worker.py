@@ -0,0 +1,50 @@
+# app/worker.py
+"""
+Standalone ingestion worker:
+
+    python -m app.worker [--concurrency N]
+
+Run it next to the API with INGESTION_WORKER_IN_PROCESS=false so uploads
+and crawls never share CPU / DB connections with chat traffic. It needs the
+same UPLOAD_DIR as the API (saved files are read from there).
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import logging
+import signal
+import threading
+
+from app.core.cpu_pool import cpu_pool
+from app.core.logging import configure_logging
+from app.core.openai_client import openai_clients
+from app.services.ingestion_queue import IngestionWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued ingestion jobs.")
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    configure_logging()
+    openai_clients.startup()
+
+    worker = IngestionWorker(concurrency=args.concurrency)
+    stopped = threading.Event()
+
+    def shutdown(signum, frame):
+        logging.info("Ingestion worker: signal %s, finishing running jobs...", signum)
+        stopped.set()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    worker.start()
+    stopped.wait()
+    worker.stop()
+    cpu_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+from app.services.chunk_sync import chunk_content_hash, sync_chunks
+
+
+class FakeQuery:
+    def __init__(self, session):
+        self.session = session
+
+    def filter_by(self, **kwargs):
+        self.session.source_filter = kwargs
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return list(self.session.existing)
+
+    def filter(self, criterion):
+        # FileEmbedding.id.in_([...])
+        self.session.deleted_ids = list(criterion.right.value)
+        return self
+
+    def delete(self, synchronize_session=None):
+        return len(self.session.deleted_ids)
+
+
+class FakeSession:
+    def __init__(self, existing=()):
+        # [(id, content_hash), ...] for the rows of the source
+        self.existing = list(existing)
+        self.source_filter = None
+        self.deleted_ids = []
+        self.added = []
+        self.flushes = 0
+        self.commits = 0
+
+    def query(self, *entities):
+        return FakeQuery(self)
+
+    def add(self, row):
+        self.added.append(row)
+
+    def flush(self):
+        self.flushes += 1
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeEmbeddingService:
+    def __init__(self):
+        self.calls = []
+
+    def create_embeddings(self, texts):
+        self.calls.append(list(texts))
+        return [([1.0] + [0.0] * 1535, len(text)) for text in texts]
+
+
+def rows_for(*chunks, first_id=1):
+    return [(first_id + offset, chunk_content_hash(chunk)) for offset, chunk in enumerate(chunks)]
+
+
+def test_first_sync_embeds_every_chunk():
+    db = FakeSession()
+    embedder = FakeEmbeddingService()
+
+    result = sync_chunks(db, embedder, {"file_id": 7}, ["a", "b"], {"file_id": 7}, batch_size=10)
+
+    assert db.source_filter == {"file_id": 7}
+    assert embedder.calls == [["a", "b"]]
+    assert [row.text_content for row in db.added] == ["a", "b"]
+    assert all(row.file_id == 7 for row in db.added)
+    assert result["chunks_created"] == 2
+    assert result["chunks_embedded"] == 2
+    assert result["rows_inserted"] == 2
+    assert result["removed_ids"] == []
+
+
+def test_unchanged_chunks_keep_their_rows():
+    db = FakeSession(rows_for("a", "b", "c"))
+    embedder = FakeEmbeddingService()
+
+    result = sync_chunks(db, embedder, {"file_id": 7}, ["a", "b", "c"], {"file_id": 7})
+
+    assert embedder.calls == []
+    assert db.added == []
+    assert result["chunks_unchanged"] == 3
+    assert result["rows_deleted"] == 0
+
+
+def test_changed_and_removed_chunks():
+    db = FakeSession(rows_for("a", "b", "c"))
+    embedder = FakeEmbeddingService()
+
+    # "b" changed to "b2", "c" removed
+    result = sync_chunks(db, embedder, {"file_id": 7}, ["a", "b2"], {"file_id": 7})
+
+    assert embedder.calls == [["b2"]]
+    assert [row.text_content for row in db.added] == ["b2"]
+    assert result["chunks_unchanged"] == 1
+    assert result["chunks_embedded"] == 1
+    assert sorted(result["removed_ids"]) == [2, 3]
+    assert sorted(db.deleted_ids) == [2, 3]
+    assert result["rows_deleted"] == 2
+
+
+def test_duplicate_chunks_are_matched_as_a_multiset():
+    # "a" stored twice; the new version has it three times and drops "b"
+    db = FakeSession(rows_for("a", "a", "b"))
+    embedder = FakeEmbeddingService()
+
+    result = sync_chunks(db, embedder, {"url_id": 5}, ["a", "a", "a"], {"url_id": 5})
+
+    assert embedder.calls == [["a"]]
+    assert result["chunks_unchanged"] == 2
+    assert result["rows_inserted"] == 1
+    assert result["removed_ids"] == [3]
+
+
+def test_duplicate_removed_keeps_oldest_row():
+    db = FakeSession(rows_for("a", "a"))
+    embedder = FakeEmbeddingService()
+
+    result = sync_chunks(db, embedder, {"file_id": 1}, ["a"], {"file_id": 1})
+
+    assert embedder.calls == []
+    assert result["removed_ids"] == [2]
+
+
+def test_batches_are_pulled_lazily_and_committed():
+    db = FakeSession()
+    embedder = FakeEmbeddingService()
+    batches = []
+
+    result = sync_chunks(
+        db,
+        embedder,
+        {"file_id": 1},
+        (f"chunk {n}" for n in range(5)),
+        {"file_id": 1},
+        batch_size=2,
+        commit_batches=True,
+        on_batch=batches.append,
+    )
+
+    assert [len(call) for call in embedder.calls] == [2, 2, 1]
+    assert batches == [2, 4, 5]
+    assert db.commits == 3
+    assert result["chunks_created"] == 5
+
+
+def test_empty_embedding_is_not_inserted():
+    class BlankEmbeddingService(FakeEmbeddingService):
+        def create_embeddings(self, texts):
+            return [([], 0) for _ in texts]
+
+    db = FakeSession()
+
+    result = sync_chunks(db, BlankEmbeddingService(), {"file_id": 1}, ["a"], {"file_id": 1})
+
+    assert db.added == []
+    assert result["chunks_embedded"] == 1
+    assert result["rows_inserted"] == 0
@@ -0,0 +1,94 @@
+import pytest
+
+from app.services import context_assembler as context_assembler_module
+from app.services.context_assembler import ContextAssembler, _MESSAGE_OVERHEAD
+
+
+class WordEncoder:
+    # one token per word: keeps the budget arithmetic readable
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(context_assembler_module, "_encoder", lambda model: WordEncoder())
+
+
+def words(count, word="w"):
+    return " ".join([word] * count)
+
+
+def prompt_tokens(messages):
+    return sum(len(m["content"].split()) + _MESSAGE_OVERHEAD for m in messages)
+
+
+def test_everything_fits():
+    assembler = ContextAssembler(model="test", budget=1000, kb_budget=500)
+
+    messages, dropped = assembler.assemble(
+        "system",
+        "question",
+        [{"text_content": "chunk one"}],
+        [("user", "hi"), ("assistant", "hello")],
+        summary="earlier",
+    )
+
+    assert dropped == 0
+    assert [m["role"] for m in messages] == ["system", "system", "system", "user", "assistant", "user"]
+    assert messages[1]["content"] == "Knowledge Base:\nchunk one"
+    assert messages[2]["content"] == "Summary of the earlier conversation:\nearlier"
+    assert messages[-1] == {"role": "user", "content": "question"}
+
+
+def test_kb_chunks_stop_at_kb_budget():
+    assembler = ContextAssembler(model="test", budget=1000, kb_budget=60)
+    chunks = [{"text_content": words(30, "a")}, {"text_content": words(30, "b")}]
+
+    messages, _ = assembler.assemble("system", "question", chunks, [])
+
+    kb = messages[1]["content"]
+    assert "a" in kb.split()
+    assert "b" not in kb.split()
+
+
+def test_smaller_kb_chunk_after_one_that_does_not_fit():
+    assembler = ContextAssembler(model="test", budget=1000, kb_budget=60)
+    chunks = [
+        {"text_content": words(30, "a")},
+        {"text_content": words(40, "b")},
+        {"text_content": words(5, "c")},
+    ]
+
+    messages, _ = assembler.assemble("system", "question", chunks, [])
+
+    kb_words = set(messages[1]["content"].split())
+    assert {"a", "c"} <= kb_words
+    assert "b" not in kb_words
+
+
+def test_history_keeps_newest_turns_within_budget():
+    assembler = ContextAssembler(model="test", budget=60, kb_budget=10)
+    history = [("user", words(10, f"t{n}")) for n in range(6)]
+
+    messages, dropped = assembler.assemble("system", "question", [], history)
+
+    kept = [m["content"] for m in messages if m["role"] == "user"][:-1]
+    assert dropped == 6 - len(kept)
+    assert dropped > 0
+    # contiguous and newest: the kept turns are the tail of the history
+    assert kept == [content for _, content in history[-len(kept):]]
+    assert prompt_tokens(messages) <= 60
+
+
+@pytest.mark.parametrize("budget", [40, 80, 150, 400])
+def test_prompt_stays_within_budget(budget):
+    assembler = ContextAssembler(model="test", budget=budget, kb_budget=budget // 2)
+    chunks = [{"text_content": words(n)} for n in (25, 10, 40, 3)]
+    history = [("user" if n % 2 else "assistant", words(7 + n)) for n in range(10)]
+
+    messages, dropped = assembler.assemble("be helpful", "what now", chunks, history, summary="so far")
+
+    # KB chunks are joined with blank lines, counted as 2 tokens each
+    assert prompt_tokens(messages) <= budget
+    assert 0 <= dropped <= len(history)
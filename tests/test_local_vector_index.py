@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from app.services.local_vector_index import LocalVectorIndex
+
+
+DIM = 4
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalVectorIndex(dim=DIM, directory=str(tmp_path))
+    index.add(
+        [1, 2, 3, 4],
+        [
+            [1, 0, 0, 0],
+            [0.9, 0.1, 0, 0],
+            [0, 1, 0, 0],
+            [0, 0, 1, 0],
+        ],
+        meta={
+            "source_type": ["file", "file", "kb_url", "kb_qa"],
+            "user_id": [10, 20, 10, None],
+            "file_id": [100, 101, None, None],
+            "url_id": [None, None, 500, None],
+            "qa_id": [None, None, None, 900],
+        },
+    )
+    return index
+
+
+def test_search_returns_nearest_first(index):
+    results = index.search([1, 0, 0, 0], top_k=2)
+
+    assert [row_id for row_id, _ in results] == [1, 2]
+    assert results[0][1] == pytest.approx(0.0, abs=1e-6)
+    assert results[0][1] < results[1][1]
+
+
+def test_vectors_are_normalised(index):
+    # scaling the query does not change cosine distances
+    assert index.search([5, 0, 0, 0], top_k=1) == index.search([1, 0, 0, 0], top_k=1)
+
+
+def test_top_k_larger_than_index(index):
+    assert len(index.search([1, 0, 0, 0], top_k=50)) == 4
+    assert index.search([1, 0, 0, 0], top_k=0) == []
+
+
+def test_filter_by_source_type(index):
+    results = index.search([1, 0, 0, 0], top_k=5, filters={"source_types": ["kb_url", "kb_qa"]})
+
+    assert sorted(row_id for row_id, _ in results) == [3, 4]
+
+
+def test_filter_by_user_and_ids(index):
+    assert [r for r, _ in index.search([1, 0, 0, 0], top_k=5, filters={"user_id": 10})] == [1, 3]
+    assert [r for r, _ in index.search([1, 0, 0, 0], top_k=5, filters={"file_ids": [101]})] == [2]
+    # filters are combined with AND
+    assert index.search([1, 0, 0, 0], top_k=5, filters={"user_id": 20, "url_ids": [500]}) == []
+
+
+def test_unknown_source_type_matches_nothing(index):
+    assert index.search([1, 0, 0, 0], filters={"source_types": ["never_seen"]}) == []
+
+
+def test_remove_masks_rows(index):
+    assert index.remove([1, 99]) == 1
+    assert len(index) == 3
+
+    results = index.search([1, 0, 0, 0], top_k=5)
+    assert 1 not in [row_id for row_id, _ in results]
+    assert results[0][0] == 2
+
+
+def test_add_grows_past_initial_capacity(tmp_path):
+    index = LocalVectorIndex(dim=DIM, directory=str(tmp_path))
+    count = 1500
+    vectors = np.random.default_rng(0).random((count, DIM))
+    index.add(np.arange(1, count + 1), vectors)
+
+    assert len(index) == count
+    assert index.search(vectors[-1], top_k=1)[0][0] == count
+
+
+def test_float16_storage(tmp_path):
+    index = LocalVectorIndex(dim=DIM, dtype="float16", directory=str(tmp_path))
+    index.add([1, 2], [[1, 0, 0, 0], [0, 1, 0, 0]])
+
+    assert index.search([0, 1, 0, 0], top_k=1)[0][0] == 2
+
+
+def test_clear(index):
+    index.clear()
+
+    assert len(index) == 0
+    assert index.search([1, 0, 0, 0]) == []
@@ -0,0 +1,84 @@
+from app.utils import lru_cache as lru_cache_module
+from app.utils.lru_cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_set_existing_key_refreshes_recency():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(lru_cache_module.time, "monotonic", clock)
+
+    cache = LRUCache(max_entries=10, ttl_seconds=5)
+    cache.set("a", 1)
+
+    clock.now += 4
+    assert cache.get("a") == 1
+
+    clock.now += 2
+    assert cache.get("a", "missing") == "missing"
+    # expired entries are dropped on read
+    assert len(cache) == 0
+
+
+def test_no_ttl_never_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(lru_cache_module.time, "monotonic", clock)
+
+    cache = LRUCache(max_entries=10)
+    cache.set("a", 1)
+    clock.now += 10 ** 9
+
+    assert cache.get("a") == 1
+
+
+def test_zero_capacity_stores_nothing():
+    cache = LRUCache(max_entries=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_stats_count_hits_and_misses():
+    cache = LRUCache(max_entries=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 4)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.prefetch import prefetch
+
+
+def test_yields_every_item_in_order():
+    assert list(prefetch(range(10), maxsize=3)) == list(range(10))
+
+
+def test_producer_stays_at_most_maxsize_ahead():
+    produced = []
+
+    def source():
+        for item in range(20):
+            produced.append(item)
+            yield item
+
+    consumed = 0
+    for _ in prefetch(source(), maxsize=2):
+        consumed += 1
+        # give the producer time to run ahead as far as it can
+        time.sleep(0.02)
+        # queue (2) + the item blocked in put() + the item being consumed
+        assert len(produced) - consumed <= 3
+
+    assert consumed == 20
+
+
+def test_producer_exception_reaches_consumer():
+    def source():
+        yield 1
+        yield 2
+        raise ValueError("bad page")
+
+    received = []
+    with pytest.raises(ValueError, match="bad page"):
+        for item in prefetch(source(), maxsize=2):
+            received.append(item)
+
+    assert received == [1, 2]
+
+
+def test_early_stop_closes_the_producer():
+    closed = threading.Event()
+
+    def source():
+        try:
+            for item in range(1000):
+                yield item
+        finally:
+            closed.set()
+
+    iterator = prefetch(source(), maxsize=2)
+    assert next(iterator) == 0
+    iterator.close()
+
+    # close() joins the producer thread, which closed the generator
+    assert closed.is_set()
@@ -0,0 +1,57 @@
+from app.services.vector_search import select_relevant_chunks
+
+
+def chunk(chunk_id, distance, lexical_match=False):
+    return {"id": chunk_id, "distance": distance, "lexical_match": lexical_match}
+
+
+def ids(chunks):
+    return [c["id"] for c in chunks]
+
+
+def test_drops_chunks_below_min_similarity():
+    chunks = [chunk(1, 0.1), chunk(2, 0.3), chunk(3, 0.6)]
+
+    selected = select_relevant_chunks(chunks, min_similarity=0.5, max_score_gap=0)
+
+    assert ids(selected) == [1, 2]
+
+
+def test_cuts_at_first_large_gap():
+    # similarities 0.95, 0.93, 0.70, 0.69: clear drop after the second
+    chunks = [chunk(1, 0.05), chunk(2, 0.07), chunk(3, 0.30), chunk(4, 0.31)]
+
+    selected = select_relevant_chunks(chunks, min_similarity=0.0, max_score_gap=0.1)
+
+    assert ids(selected) == [1, 2]
+
+
+def test_gap_is_measured_on_sorted_scores():
+    # input order is not similarity order
+    chunks = [chunk(1, 0.30), chunk(2, 0.05), chunk(3, 0.08)]
+
+    selected = select_relevant_chunks(chunks, min_similarity=0.0, max_score_gap=0.1)
+
+    assert ids(selected) == [2, 3]
+
+
+def test_zero_gap_disables_the_cut():
+    chunks = [chunk(1, 0.05), chunk(2, 0.6)]
+
+    selected = select_relevant_chunks(chunks, min_similarity=0.0, max_score_gap=0)
+
+    assert ids(selected) == [1, 2]
+
+
+def test_lexical_matches_are_always_kept_in_order():
+    chunks = [chunk(1, 0.9, lexical_match=True), chunk(2, 0.05), chunk(3, 0.95)]
+
+    selected = select_relevant_chunks(chunks, min_similarity=0.5, max_score_gap=0.1)
+
+    assert ids(selected) == [1, 2]
+
+
+def test_nothing_relevant():
+    chunks = [chunk(1, 0.8), chunk(2, 0.9)]
+
+    assert select_relevant_chunks(chunks, min_similarity=0.5, max_score_gap=0.1) == []
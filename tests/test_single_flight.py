@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "answer"
+
+        waiters = [asyncio.ensure_future(flight.do("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert len(flight) == 1
+
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return calls, results, len(flight)
+
+    calls, results, in_flight = asyncio.run(scenario())
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["answer"] * 3
+    # only the first caller ran fn()
+    assert [shared for _, shared in results] == [False, True, True]
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def make(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(
+            flight.do("a", lambda: make(1)),
+            flight.do("b", lambda: make(2)),
+        )
+
+    assert asyncio.run(scenario()) == [(1, False), (2, False)]
+
+
+def test_error_reaches_every_caller():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", fn),
+            flight.do("key", fn),
+            return_exceptions=True,
+        )
+        return calls, results, len(flight)
+
+    calls, results, in_flight = asyncio.run(scenario())
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert in_flight == 0
+
+
+def test_nothing_cached_after_completion():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        first = await flight.do("key", fn)
+        second = await flight.do("key", fn)
+        return first, second
+
+    assert asyncio.run(scenario()) == ((1, False), (2, False))
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            return "answer"
+
+        first = asyncio.ensure_future(flight.do("key", fn))
+        second = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == ("answer", True)